@@ -21,6 +21,7 @@
         'security/ir.model.access.csv',
         # 'views/res_partner_view.xml',
         'wizards/import_wizard_views.xml',
+        'data/ir_cron.xml',
         'views/projet_inherit_view.xml',# Fichier de sécurité (très important !)
         'views/sale_order_view.xml',
         'views/project_list_view_inherit.xml',
@@ -3,3 +3,10 @@
 from . import inherit_project
 from  . import sale_project
 from . import inherit_purchase
+from . import sync_idempotency
+from . import sync_mapping
+from . import sync_message
+from . import sync_processor
+from . import sync_cache
+from . import sync_payload_archive
+from . import ir_http
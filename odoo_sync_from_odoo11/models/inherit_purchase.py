@@ -1,4 +1,12 @@
 from odoo import models, fields, api
+from odoo.tools.sql import create_index
+from collections import defaultdict
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Commandes synchronisées confirmées par exécution du cron
+SYNC_CONFIRM_BATCH_SIZE = 100
 
 class PurchaseOrder(models.Model):
     _inherit = 'purchase.order'
@@ -16,6 +24,54 @@ class PurchaseOrder(models.Model):
     date_planned = fields.Datetime(string='Date Prévisionnelle de Livraison')
     ref_Fp = fields.Char(string='Commande Client / FP')
     client_id = fields.Many2one(string='Client', comodel_name='res.partner', ondelete='restrict')
+    sync_confirm_pending = fields.Boolean(string='Confirmation différée', copy=False, readonly=True,
+                                          help="Commande synchronisée depuis Odoo11, confirmée par la tâche planifiée")
+
+    def init(self):
+        super().init()
+        # Index partiel : le cron ne lit que les commandes en attente de confirmation
+        create_index(self.env.cr, 'purchase_order_sync_confirm_pending_index', self._table,
+                     ['company_id', 'picking_type_id', 'id'], where='sync_confirm_pending')
+
+    @api.model
+    def _cron_confirm_synced_orders(self, batch_size=SYNC_CONFIRM_BATCH_SIZE):
+        """Confirme les commandes synchronisées en attente, par lots groupés par société et entrepôt.
+
+        La génération des réceptions et des règles d'approvisionnement est ainsi regroupée ;
+        un commit par groupe, puis replanification s'il reste des commandes.
+        """
+        orders = self.sudo().search([('sync_confirm_pending', '=', True)],
+                                    order='company_id, picking_type_id, id', limit=batch_size)
+        # Commandes confirmées ou annulées entre-temps
+        done = orders.filtered(lambda order: order.state not in ('draft', 'sent'))
+        done.sync_confirm_pending = False
+
+        groups = defaultdict(lambda: self.sudo().browse())
+        for order in orders - done:
+            groups[(order.company_id, order.picking_type_id.warehouse_id)] |= order
+
+        for (company, warehouse), group in groups.items():
+            group = group.with_company(company)
+            try:
+                with self.env.cr.savepoint():
+                    group.button_confirm()
+                    group.sync_confirm_pending = False
+                _logger.info("%d commandes synchronisées confirmées (%s / %s)",
+                             len(group), company.name, warehouse.name or '-')
+            except Exception as e:
+                _logger.warning("Confirmation groupée impossible (%s), repli commande par commande", str(e))
+                for order in group:
+                    try:
+                        with self.env.cr.savepoint():
+                            order.button_confirm()
+                    except Exception as e:
+                        _logger.error("Erreur confirmation commande %s: %s", order.name, str(e))
+                        order.message_post(body=f"Confirmation automatique impossible : {e}")
+                    order.sync_confirm_pending = False
+            self.env.cr.commit()
+
+        if len(orders) == batch_size:
+            self.env.ref('odoo_sync_from_odoo11.ir_cron_confirm_synced_purchase_orders')._trigger()
     
 # class DossierCommercial(models.Model):
 #     _inherit = 'dossier.commercial'
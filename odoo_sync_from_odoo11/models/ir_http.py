@@ -0,0 +1,43 @@
+from odoo import models
+from odoo.http import request
+from werkzeug.exceptions import RequestEntityTooLarge
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Paramètre système : taille maximale (octets) d'un contenu reçu sur /odoo_sync
+MAX_PAYLOAD_SIZE_PARAM = 'odoo_sync_from_odoo11.max_payload_size'
+DEFAULT_MAX_PAYLOAD_SIZE = 20 * 1024 * 1024
+
+
+class IrHttp(models.AbstractModel):
+    _inherit = 'ir.http'
+
+    @classmethod
+    def _pre_dispatch(cls, rule, args):
+        super()._pre_dispatch(rule, args)
+        # Appelé avant la lecture du corps JSON par le dispatcher : un contenu trop volumineux
+        # est refusé sur son Content-Length, sans être chargé en mémoire
+        if rule.rule.startswith('/odoo_sync/'):
+            cls._check_sync_payload_size()
+
+    @classmethod
+    def _check_sync_payload_size(cls):
+        try:
+            max_size = int(request.env['ir.config_parameter'].sudo().get_param(
+                MAX_PAYLOAD_SIZE_PARAM, DEFAULT_MAX_PAYLOAD_SIZE))
+        except ValueError:
+            max_size = DEFAULT_MAX_PAYLOAD_SIZE
+        if not max_size:
+            return
+        # Limite appliquée par werkzeug à la lecture du flux : couvre aussi les corps
+        # envoyés sans Content-Length (transfert par blocs)
+        request.httprequest.max_content_length = max_size
+
+        content_length = request.httprequest.content_length
+        if content_length and content_length > max_size:
+            _logger.warning("Contenu refusé sur %s : %d octets (maximum %d)",
+                            request.httprequest.path, content_length, max_size)
+            raise RequestEntityTooLarge(
+                f"Contenu trop volumineux : {content_length} octets (maximum {max_size}). "
+                f"Découper l'envoi en plusieurs lots.")
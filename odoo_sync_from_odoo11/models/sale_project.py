@@ -1,4 +1,5 @@
 from odoo import models, fields, api
+from odoo.tools.sql import create_index
 
 class SaleOrder(models.Model):
     _inherit = 'sale.order'
@@ -8,6 +9,12 @@ class SaleOrder(models.Model):
     delaicontractuel = fields.Date(string='Délai Contractuel')
     priorite = fields.Selection([('urgent', 'Urgent'), ('normal', 'Normal'), ('basse', 'Basse')], string='Priorité', default='normal')
 
+    def init(self):
+        super().init()
+        # Index btree sur la référence : la détection des doublons de synchronisation Odoo11
+        # (name = ...) ne doit jamais parcourir toute la table
+        create_index(self.env.cr, 'sale_order_name_sync_index', self._table, ['name'])
+
     def action_open_create_project_wizard(self):
         self.ensure_one()
         
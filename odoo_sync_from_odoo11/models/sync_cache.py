@@ -0,0 +1,113 @@
+from odoo import models, api
+from collections import Counter
+import logging
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Durée de validité des valeurs en cache (secondes) : borne le décalage entre workers,
+# l'invalidation à l'écriture n'agissant que sur le worker qui écrit
+LOOKUP_CACHE_TTL = 300
+LOOKUP_CACHE_MAX_SIZE = 1000
+
+
+class LookupCache:
+    """ Cache par worker à durée de vie limitée pour les recherches de la synchronisation Odoo11.
+
+    Les clés sont (base, espace, clé) ; un espace (ex: 'currency') est vidé entièrement
+    quand le modèle sous-jacent est modifié. Compteurs de hits/misses par espace.
+    """
+
+    def __init__(self, ttl=LOOKUP_CACHE_TTL, max_size=LOOKUP_CACHE_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = Counter()
+        self.misses = Counter()
+
+    def get_or_compute(self, dbname, namespace, key, compute):
+        """ Valeur en cache, sinon compute() mis en cache pour ttl secondes """
+        cache_key = (dbname, namespace, key)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry and entry[0] > now:
+                self.hits[namespace] += 1
+                return entry[1]
+            self.misses[namespace] += 1
+        value = compute()
+        self.set(dbname, namespace, key, value)
+        return value
+
+    def set(self, dbname, namespace, key, value):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self.max_size:
+                self._entries = {k: entry for k, entry in self._entries.items() if entry[0] > now}
+                if len(self._entries) >= self.max_size:
+                    self._entries.clear()
+            self._entries[(dbname, namespace, key)] = (now + self.ttl, value)
+
+    def invalidate(self, dbname, namespace):
+        with self._lock:
+            self._entries = {k: entry for k, entry in self._entries.items() if k[:2] != (dbname, namespace)}
+
+    def stats(self):
+        """ {espace: {'hits', 'misses', 'hit_ratio'}} depuis le démarrage du worker """
+        with self._lock:
+            return {
+                namespace: {
+                    'hits': self.hits[namespace],
+                    'misses': self.misses[namespace],
+                    'hit_ratio': round(self.hits[namespace] / (self.hits[namespace] + self.misses[namespace]), 3),
+                }
+                for namespace in set(self.hits) | set(self.misses)
+            }
+
+
+LOOKUP_CACHE = LookupCache()
+
+
+class LookupCacheInvalidationMixin(models.AbstractModel):
+    """ Vide l'espace de cache _lookup_cache_namespace à chaque création, écriture ou suppression """
+    _name = 'odoo11.sync.lookup.cache.mixin'
+    _description = 'Invalidation du cache de recherche Odoo11'
+
+    _lookup_cache_namespaces = ()
+
+    def _invalidate_lookup_cache(self):
+        for namespace in self._lookup_cache_namespaces:
+            LOOKUP_CACHE.invalidate(self.env.cr.dbname, namespace)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self._invalidate_lookup_cache()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        self._invalidate_lookup_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        self._invalidate_lookup_cache()
+        return super().unlink()
+
+
+class ResCurrency(models.Model):
+    _name = 'res.currency'
+    _inherit = ['res.currency', 'odoo11.sync.lookup.cache.mixin']
+    _lookup_cache_namespaces = ('currency',)
+
+
+class ResCompany(models.Model):
+    _name = 'res.company'
+    _inherit = ['res.company', 'odoo11.sync.lookup.cache.mixin']
+    _lookup_cache_namespaces = ('company',)
+
+
+class ProductProduct(models.Model):
+    _name = 'product.product'
+    _inherit = ['product.product', 'odoo11.sync.lookup.cache.mixin']
+    _lookup_cache_namespaces = ('generic_product',)
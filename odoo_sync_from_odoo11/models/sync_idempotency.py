@@ -0,0 +1,97 @@
+from odoo import models, fields, api
+from odoo.tools import mute_logger
+from psycopg2 import IntegrityError, errorcodes
+from datetime import timedelta
+import hashlib
+import json
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Durée de conservation des clés d'idempotence (jours)
+IDEMPOTENCY_KEY_DAYS = 30
+
+
+class Odoo11SyncIdempotency(models.Model):
+    _name = 'odoo11.sync.idempotency'
+    _description = "Clé d'idempotence de synchronisation Odoo11"
+    _order = 'id desc'
+
+    key = fields.Char(string='Clé', required=True, readonly=True)
+    model = fields.Char(string='Modèle', required=True, readonly=True)
+    name = fields.Char(string='Référence', readonly=True)
+    payload_hash = fields.Char(string='Empreinte du contenu', readonly=True)
+    res_id = fields.Integer(string='ID enregistrement', readonly=True)
+    response = fields.Json(string='Réponse', readonly=True)
+
+    # La contrainte crée l'index unique utilisé par toutes les recherches par clé
+    _sql_constraints = [
+        ('key_uniq', 'unique(key)', "La clé d'idempotence doit être unique."),
+    ]
+
+    @api.model
+    def _make_key(self, model, name, payload):
+        """ Clé = modèle, référence et empreinte SHA-256 du contenu (JSON canonique) """
+        canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+        payload_hash = hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+        return f"{model}:{name}:{payload_hash}", payload_hash
+
+    @api.model
+    def _get_response(self, key):
+        """ Réponse mise en cache pour la clé, ou None """
+        records = self.sudo().search_read([('key', '=', key)], ['response'], limit=1)
+        return records[0]['response'] if records and records[0]['response'] is not None else None
+
+    @api.model
+    def _get_responses(self, keys):
+        """ Réponses en cache pour plusieurs clés, en une requête : {clé: réponse} """
+        if not keys:
+            return {}
+        return {
+            record['key']: record['response']
+            for record in self.sudo().search_read([('key', 'in', list(keys))], ['key', 'response'])
+            if record['response'] is not None
+        }
+
+    @api.model
+    def _reserve(self, key, model, name, payload_hash):
+        """ Réserve la clé avant traitement.
+
+        Retourne l'enregistrement réservé, ou False si une autre requête détient déjà la clé
+        (une relance concurrente attend la fin de la première puis échoue sur l'index unique).
+        """
+        try:
+            with mute_logger('odoo.sql_db'), self.env.cr.savepoint():
+                record = self.sudo().create({
+                    'key': key,
+                    'model': model,
+                    'name': name,
+                    'payload_hash': payload_hash,
+                })
+                record.flush_recordset()
+                return record
+        except IntegrityError as e:
+            if e.pgcode != errorcodes.UNIQUE_VIOLATION:
+                raise
+            _logger.info("Clé d'idempotence %s déjà réservée", key)
+            return False
+
+    @api.model
+    def _get_concurrent_response(self, key):
+        """ Réponse pour une clé détenue par une requête concurrente : statut « retry ».
+
+        La réponse de la première requête n'est pas lisible ici : l'instantané de la transaction
+        (REPEATABLE READ) précède sa validation. La relance la lira depuis le cache.
+        """
+        return {"status": "retry", "message": "SaleOrder en cours de traitement par une autre requête, réessayer plus tard"}
+
+    def _store_response(self, response, res_id=False):
+        """ Enregistre la réponse renvoyée aux relances suivantes """
+        self.ensure_one()
+        self.sudo().write({'response': response, 'res_id': res_id or 0})
+
+    @api.autovacuum
+    def _gc_idempotency_keys(self):
+        """ Purge les clés plus anciennes que IDEMPOTENCY_KEY_DAYS """
+        limit_date = fields.Datetime.now() - timedelta(days=IDEMPOTENCY_KEY_DAYS)
+        self.sudo().search([('create_date', '<', limit_date)]).unlink()
@@ -0,0 +1,215 @@
+from odoo import models, fields, api
+from odoo.osv import expression
+from odoo.tools import mute_logger, split_every
+from psycopg2 import IntegrityError
+from collections import OrderedDict
+import logging
+import threading
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Nombre de correspondances gardées en mémoire par processus
+MAPPING_CACHE_SIZE = 10000
+
+# Nombre de noms recherchés par requête
+MAPPING_SEARCH_CHUNK_SIZE = 500
+
+# Durée (secondes) pendant laquelle un enregistrement Odoo11 introuvable n'est pas recherché
+# à nouveau par nom ; borne le délai de prise en compte d'un enregistrement local créé depuis
+MAPPING_MISS_TTL = 300
+
+# Cache LRU {(base, modèle, id distant): id local}, partagé par les requêtes du processus
+_MAPPING_CACHE = OrderedDict()
+_MAPPING_CACHE_LOCK = threading.Lock()
+# (base, modèle) dont les correspondances ont déjà été préchargées dans ce processus
+_WARM_MODELS = set()
+# Introuvables sans création {(base, modèle, id distant): expiration}, partagés par les requêtes du processus
+_MISS_CACHE = OrderedDict()
+
+
+def _cache_get(key):
+    with _MAPPING_CACHE_LOCK:
+        res_id = _MAPPING_CACHE.get(key)
+        if res_id is not None:
+            _MAPPING_CACHE.move_to_end(key)
+        return res_id
+
+
+def _cache_set(entries):
+    with _MAPPING_CACHE_LOCK:
+        for key, res_id in entries.items():
+            _MAPPING_CACHE[key] = res_id
+            _MAPPING_CACHE.move_to_end(key)
+        while len(_MAPPING_CACHE) > MAPPING_CACHE_SIZE:
+            _MAPPING_CACHE.popitem(last=False)
+
+
+def _cache_discard(keys):
+    with _MAPPING_CACHE_LOCK:
+        for key in keys:
+            _MAPPING_CACHE.pop(key, None)
+
+
+def _miss_cached(key):
+    with _MAPPING_CACHE_LOCK:
+        expiry = _MISS_CACHE.get(key)
+        if expiry is None:
+            return False
+        if expiry <= time.monotonic():
+            del _MISS_CACHE[key]
+            return False
+        return True
+
+
+def _miss_set(keys):
+    expiry = time.monotonic() + MAPPING_MISS_TTL
+    with _MAPPING_CACHE_LOCK:
+        for key in keys:
+            _MISS_CACHE[key] = expiry
+            _MISS_CACHE.move_to_end(key)
+        while len(_MISS_CACHE) > MAPPING_CACHE_SIZE:
+            _MISS_CACHE.popitem(last=False)
+
+
+class Odoo11SyncMapping(models.Model):
+    _name = 'odoo11.sync.mapping'
+    _description = "Correspondance d'enregistrements Odoo11 / Odoo local"
+    _order = 'model, remote_id'
+
+    model = fields.Char(string='Modèle', required=True, readonly=True)
+    remote_id = fields.Integer(string='ID Odoo11', required=True, readonly=True)
+    remote_name = fields.Char(string='Nom Odoo11', readonly=True)
+    res_id = fields.Integer(string='ID local', required=True, readonly=True)
+
+    # Index unique (model, remote_id) : la résolution ne parcourt jamais la table
+    _sql_constraints = [
+        ('model_remote_uniq', 'unique(model, remote_id)', "Un enregistrement Odoo11 ne peut avoir qu'une correspondance."),
+    ]
+
+    def _cache_keys(self):
+        dbname = self.env.cr.dbname
+        return [(dbname, mapping.model, mapping.remote_id) for mapping in self]
+
+    def write(self, vals):
+        _cache_discard(self._cache_keys())
+        return super().write(vals)
+
+    def unlink(self):
+        _cache_discard(self._cache_keys())
+        return super().unlink()
+
+    @api.model
+    def _warm_cache(self, model_name):
+        """ Précharge une fois par processus les correspondances les plus récentes du modèle """
+        warm_key = (self.env.cr.dbname, model_name)
+        if warm_key in _WARM_MODELS:
+            return
+        mappings = self.sudo().search_read(
+            [('model', '=', model_name)], ['remote_id', 'res_id'], order='id desc', limit=MAPPING_CACHE_SIZE)
+        # Les plus anciennes d'abord : les plus récentes restent en fin de LRU
+        _cache_set({
+            (warm_key[0], model_name, mapping['remote_id']): mapping['res_id']
+            for mapping in reversed(mappings)
+        })
+        _WARM_MODELS.add(warm_key)
+        _logger.info("Cache de correspondances %s préchargé (%d entrées)", model_name, len(mappings))
+
+    @api.model
+    def _resolve(self, model_name, refs, create_vals=None):
+        """ Résout des enregistrements Odoo11 {id distant: nom} en enregistrements locaux.
+
+        Ordre : cache LRU, table de correspondance, enregistrement local de même nom, puis
+        création groupée (un seul create) si create_vals est fourni.
+        Retourne {id distant: enregistrement} ; les introuvables non créés sont absents.
+        Sans create_vals, un introuvable n'est recherché par nom qu'une fois par MAPPING_MISS_TTL.
+        """
+        Model = self.env[model_name].sudo()
+        dbname = self.env.cr.dbname
+        self._warm_cache(model_name)
+        res_ids = {}
+        for remote_id in refs:
+            res_id = _cache_get((dbname, model_name, remote_id))
+            if res_id is not None:
+                res_ids[remote_id] = res_id
+
+        uncached = [remote_id for remote_id in refs if remote_id not in res_ids]
+        if uncached:
+            mappings = self.sudo().search_read(
+                [('model', '=', model_name), ('remote_id', 'in', uncached)], ['remote_id', 'res_id'])
+            res_ids.update((mapping['remote_id'], mapping['res_id']) for mapping in mappings)
+
+        # Correspondances vers des enregistrements supprimés depuis
+        existing_ids = set(Model.browse(set(res_ids.values())).exists().ids)
+        stale = [remote_id for remote_id, res_id in res_ids.items() if res_id not in existing_ids]
+        if stale:
+            _cache_discard([(dbname, model_name, remote_id) for remote_id in stale])
+            self.sudo().search([('model', '=', model_name), ('remote_id', 'in', stale)]).unlink()
+            for remote_id in stale:
+                del res_ids[remote_id]
+        _cache_set({(dbname, model_name, remote_id): res_id for remote_id, res_id in res_ids.items()})
+
+        missing = {remote_id: refs[remote_id] for remote_id in refs if remote_id not in res_ids}
+        if not create_vals:
+            missing = {
+                remote_id: name for remote_id, name in missing.items()
+                if not _miss_cached((dbname, model_name, remote_id))
+            }
+        if missing:
+            res_ids.update(self._map_missing(model_name, missing, create_vals))
+        return {remote_id: Model.browse(res_id) for remote_id, res_id in res_ids.items()}
+
+    @api.model
+    def _map_missing(self, model_name, refs, create_vals):
+        """ Associe les enregistrements sans correspondance : même nom local, sinon création
+        (seulement avec create_vals) """
+        Model = self.env[model_name].sudo()
+        local_ids = {}
+        names = {str(name or '').strip().lower() for name in refs.values()}
+        names.discard('')
+        for chunk in split_every(MAPPING_SEARCH_CHUNK_SIZE, names):
+            domain = expression.OR([[('name', '=ilike', name)] for name in chunk])
+            for record in Model.search_read(domain, ['name']):
+                local_ids.setdefault(str(record['name'] or '').strip().lower(), record['id'])
+
+        res_ids = {}
+        to_create = {}
+        for remote_id, name in refs.items():
+            res_id = local_ids.get(str(name or '').strip().lower())
+            if res_id:
+                res_ids[remote_id] = res_id
+            else:
+                to_create[remote_id] = name
+        if to_create and create_vals:
+            created = Model.create([create_vals(name) for name in to_create.values()])
+            res_ids.update(zip(to_create, created.ids))
+            _logger.info("%d %s créés : %s", len(created), model_name, ', '.join(created.mapped('display_name')))
+        elif to_create:
+            # Introuvables mémorisés : les requêtes suivantes ne refont pas la recherche par nom
+            dbname = self.env.cr.dbname
+            _miss_set([(dbname, model_name, remote_id) for remote_id in to_create])
+
+        if not res_ids:
+            return res_ids
+        mapping_vals = [{
+            'model': model_name,
+            'remote_id': remote_id,
+            'remote_name': refs[remote_id],
+            'res_id': res_id,
+        } for remote_id, res_id in res_ids.items()]
+        try:
+            with mute_logger('odoo.sql_db'), self.env.cr.savepoint():
+                self.sudo().create(mapping_vals).flush_recordset()
+        except IntegrityError:
+            # Synchronisation concurrente : ses correspondances font foi
+            _logger.info("Correspondances %s créées en parallèle, relecture", model_name)
+            mappings = self.sudo().search_read(
+                [('model', '=', model_name), ('remote_id', 'in', list(res_ids))], ['remote_id', 'res_id'])
+            res_ids.update((mapping['remote_id'], mapping['res_id']) for mapping in mappings)
+            return res_ids
+
+        # Cache alimenté après commit seulement : un rollback ne doit pas y laisser d'ID fantôme
+        dbname = self.env.cr.dbname
+        entries = {(dbname, model_name, remote_id): res_id for remote_id, res_id in res_ids.items()}
+        self.env.cr.postcommit.add(lambda: _cache_set(entries))
+        return res_ids
@@ -0,0 +1,198 @@
+from odoo import models, fields, api
+from odoo.tools.sql import create_index
+from datetime import timedelta
+import logging
+import uuid
+
+_logger = logging.getLogger(__name__)
+
+# Paramètre système activant la réception asynchrone des routes /odoo_sync
+ASYNC_INGESTION_PARAM = 'odoo_sync_from_odoo11.async_ingestion'
+
+# Messages traités par exécution du cron
+MESSAGE_BATCH_SIZE = 50
+# Nombre d'essais avant passage en lettre morte
+MESSAGE_MAX_ATTEMPTS = 5
+# Délai avant le premier nouvel essai (secondes), doublé à chaque échec
+MESSAGE_RETRY_DELAY = 60
+MESSAGE_RETRY_MAX_DELAY = 3600
+# Un message resté « en cours » plus longtemps a été interrompu (arrêt du worker)
+MESSAGE_PROCESSING_TIMEOUT = timedelta(minutes=30)
+# Durée de conservation des messages traités (jours)
+MESSAGE_DONE_DAYS = 30
+
+
+class SyncMessageError(Exception):
+    """ Réponse en erreur du traitement : annule le savepoint du message """
+
+
+class Odoo11SyncMessage(models.Model):
+    _name = 'odoo11.sync.message'
+    _description = "Message de synchronisation Odoo11 en file d'attente"
+    _order = 'id desc'
+
+    token = fields.Char(string='Jeton', required=True, readonly=True, copy=False,
+                        default=lambda self: uuid.uuid4().hex)
+    endpoint = fields.Selection([
+        ('sale_order', 'SaleOrder'),
+        ('sale_orders_batch', 'Lot de SaleOrder'),
+        ('account_invoice', 'AccountInvoice'),
+        ('purchase_order', 'PurchaseOrder'),
+    ], string="Point d'entrée", required=True, readonly=True)
+    name = fields.Char(string='Référence', readonly=True)
+    payload = fields.Json(string='Contenu reçu', readonly=True)
+    state = fields.Selection([
+        ('pending', 'En attente'),
+        ('processing', 'En cours'),
+        ('done', 'Traité'),
+        ('failed', 'En échec (nouvel essai prévu)'),
+        ('dead', 'Lettre morte'),
+    ], string='État', default='pending', required=True, readonly=True)
+    attempts = fields.Integer(string='Essais', readonly=True)
+    next_attempt_at = fields.Datetime(string='Prochain essai', default=fields.Datetime.now, readonly=True)
+    processing_started_at = fields.Datetime(string='Début du traitement', readonly=True)
+    processed_at = fields.Datetime(string='Traité le', readonly=True)
+    last_error = fields.Text(string='Dernière erreur', readonly=True)
+    response = fields.Json(string='Réponse', readonly=True)
+
+    _sql_constraints = [
+        ('token_uniq', 'unique(token)', 'Le jeton du message doit être unique.'),
+    ]
+
+    def init(self):
+        super().init()
+        # Sélection des messages à traiter par le cron sans parcourir les messages traités
+        create_index(self.env.cr, 'odoo11_sync_message_queue_index', self._table,
+                     ['next_attempt_at', 'id'], where="state IN ('pending', 'failed')")
+
+    @api.model
+    def _is_async_enabled(self):
+        value = self.env['ir.config_parameter'].sudo().get_param(ASYNC_INGESTION_PARAM, 'False')
+        return value.strip().lower() in ('1', 'true', 'yes')
+
+    @api.model
+    def _enqueue(self, endpoint, data):
+        """ Enregistre le contenu reçu et réveille le cron de traitement """
+        message = self.sudo().create({
+            'endpoint': endpoint,
+            'name': data.get('name') if isinstance(data, dict) else False,
+            'payload': data,
+        })
+        cron = self.env.ref('odoo_sync_from_odoo11.ir_cron_odoo11_sync_messages', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+        _logger.info("Message %s %s mis en file (%s)", endpoint, message.name or '', message.token)
+        return message
+
+    def _accepted_response(self):
+        """ Réponse immédiate à l'expéditeur (équivalent 202 : les routes JSON-RPC répondent toujours 200) """
+        self.ensure_one()
+        return {
+            "status": "accepted",
+            "code": 202,
+            "message_token": self.token,
+            "status_route": "/odoo_sync/message_status",
+        }
+
+    def _status_response(self):
+        """ État du message consultable par l'expéditeur """
+        self.ensure_one()
+        return {
+            "status": "success",
+            "message_token": self.token,
+            "state": self.state,
+            "attempts": self.attempts,
+            "next_attempt_at": fields.Datetime.to_string(self.next_attempt_at) if self.state == 'failed' else False,
+            "last_error": self.last_error or False,
+            "response": self.response or False,
+        }
+
+    @api.model
+    def _cron_process_messages(self, batch_size=MESSAGE_BATCH_SIZE):
+        """ Traite un lot de messages (un commit par message) et se replanifie s'il en reste """
+        self._requeue_stalled_messages()
+        messages = self._claim_messages(batch_size)
+        for message in messages:
+            message._process_message()
+            self.env.cr.commit()
+        if len(messages) == batch_size:
+            self.env.ref('odoo_sync_from_odoo11.ir_cron_odoo11_sync_messages')._trigger()
+
+    @api.model
+    def _claim_messages(self, limit):
+        """ Réserve les messages à traiter ; SKIP LOCKED permet plusieurs workers en parallèle """
+        now = fields.Datetime.now()
+        self.env.cr.execute("""
+            SELECT id FROM odoo11_sync_message
+             WHERE state IN ('pending', 'failed') AND next_attempt_at <= %s
+             ORDER BY next_attempt_at, id
+             LIMIT %s
+               FOR UPDATE SKIP LOCKED
+        """, [now, limit])
+        messages = self.browse([row[0] for row in self.env.cr.fetchall()])
+        if messages:
+            messages.write({'state': 'processing', 'processing_started_at': now})
+            self.env.cr.commit()
+        return messages
+
+    @api.model
+    def _requeue_stalled_messages(self):
+        """ Remet en file les messages dont le traitement a été interrompu """
+        stalled = self.search([
+            ('state', '=', 'processing'),
+            ('processing_started_at', '<', fields.Datetime.now() - MESSAGE_PROCESSING_TIMEOUT),
+        ])
+        for message in stalled:
+            message._mark_failed("Traitement interrompu")
+
+    def _process_message(self):
+        self.ensure_one()
+        try:
+            with self.env.cr.savepoint():
+                response = self.env['odoo11.sync.processor'].sudo()._process(self.endpoint, self.payload)
+                if response.get('status') in ('error', 'retry'):
+                    raise SyncMessageError(response.get('message') or 'Erreur inconnue')
+        except Exception as e:
+            _logger.warning("Message %s (%s) en échec : %s", self.token, self.endpoint, str(e))
+            self._mark_failed(str(e))
+            return
+        self.write({
+            'state': 'done',
+            'response': response,
+            'processed_at': fields.Datetime.now(),
+            'attempts': self.attempts + 1,
+            'last_error': False,
+        })
+
+    def _mark_failed(self, error):
+        """ Nouvel essai avec délai exponentiel, ou lettre morte après MESSAGE_MAX_ATTEMPTS """
+        self.ensure_one()
+        attempts = self.attempts + 1
+        if attempts >= MESSAGE_MAX_ATTEMPTS:
+            _logger.error("Message %s (%s) en lettre morte après %d essais : %s", self.token, self.endpoint, attempts, error)
+            self.write({'state': 'dead', 'attempts': attempts, 'last_error': error})
+            return
+        delay = min(MESSAGE_RETRY_DELAY * 2 ** (attempts - 1), MESSAGE_RETRY_MAX_DELAY)
+        self.write({
+            'state': 'failed',
+            'attempts': attempts,
+            'last_error': error,
+            'next_attempt_at': fields.Datetime.now() + timedelta(seconds=delay),
+        })
+
+    def action_retry(self):
+        """ Relance des messages en lettre morte ou en échec """
+        self.filtered(lambda message: message.state in ('failed', 'dead')).write({
+            'state': 'pending',
+            'attempts': 0,
+            'next_attempt_at': fields.Datetime.now(),
+        })
+        cron = self.env.ref('odoo_sync_from_odoo11.ir_cron_odoo11_sync_messages', raise_if_not_found=False)
+        if cron:
+            cron._trigger()
+
+    @api.autovacuum
+    def _gc_done_messages(self):
+        """ Purge les messages traités depuis plus de MESSAGE_DONE_DAYS """
+        limit_date = fields.Datetime.now() - timedelta(days=MESSAGE_DONE_DAYS)
+        self.sudo().search([('state', '=', 'done'), ('processed_at', '<', limit_date)]).unlink()
@@ -0,0 +1,56 @@
+from odoo import models, fields, api
+from datetime import timedelta
+import base64
+import json
+import logging
+import random
+import zlib
+
+_logger = logging.getLogger(__name__)
+
+# Paramètre système : proportion (0 à 1) des contenus reçus archivés, 0 par défaut
+PAYLOAD_ARCHIVE_RATE_PARAM = 'odoo_sync_from_odoo11.payload_archive_rate'
+# Durée de conservation des contenus archivés (jours)
+PAYLOAD_ARCHIVE_DAYS = 30
+
+
+class Odoo11SyncPayloadArchive(models.Model):
+    _name = 'odoo11.sync.payload.archive'
+    _description = 'Contenu reçu d\'Odoo11 archivé (échantillon compressé)'
+    _order = 'id desc'
+
+    endpoint = fields.Char(string="Point d'entrée", required=True, readonly=True)
+    name = fields.Char(string='Référence', readonly=True)
+    size = fields.Integer(string='Taille (octets)', readonly=True)
+    compressed_size = fields.Integer(string='Taille compressée (octets)', readonly=True)
+    payload_zlib = fields.Binary(string='Contenu compressé (zlib)', attachment=False, readonly=True)
+
+    @api.model
+    def _sample(self, endpoint, data, get_raw_data):
+        """ Archive le contenu brut (get_raw_data() -> bytes) selon le taux d'échantillonnage configuré """
+        try:
+            rate = float(self.env['ir.config_parameter'].sudo().get_param(PAYLOAD_ARCHIVE_RATE_PARAM, 0) or 0)
+        except ValueError:
+            rate = 0
+        if rate <= 0 or random.random() >= rate:
+            return self.browse()
+        raw_data = get_raw_data()
+        compressed = zlib.compress(raw_data)
+        return self.sudo().create({
+            'endpoint': endpoint,
+            'name': data.get('name') if isinstance(data, dict) else False,
+            'size': len(raw_data),
+            'compressed_size': len(compressed),
+            'payload_zlib': base64.b64encode(compressed),
+        })
+
+    def _get_payload(self):
+        """ Contenu décompressé et décodé """
+        self.ensure_one()
+        return json.loads(zlib.decompress(base64.b64decode(self.payload_zlib)).decode('utf-8'))
+
+    @api.autovacuum
+    def _gc_payload_archive(self):
+        """ Purge les contenus archivés depuis plus de PAYLOAD_ARCHIVE_DAYS """
+        limit_date = fields.Datetime.now() - timedelta(days=PAYLOAD_ARCHIVE_DAYS)
+        self.sudo().search([('create_date', '<', limit_date)]).unlink()
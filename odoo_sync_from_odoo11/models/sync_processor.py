@@ -0,0 +1,658 @@
+from odoo import models, api, SUPERUSER_ID
+from odoo.osv import expression
+from odoo.tools import split_every
+import logging
+
+from .sync_cache import LOOKUP_CACHE
+
+_logger = logging.getLogger(__name__)
+
+# Paramètre système : commandes d'achat synchronisées confirmées par le cron plutôt qu'à la réception
+DEFERRED_PO_CONFIRM_PARAM = 'odoo_sync_from_odoo11.deferred_po_confirm'
+
+# Nombre de noms de produits recherchés par requête
+PRODUCT_SEARCH_CHUNK_SIZE = 500
+
+# Méthode de traitement par point d'entrée /odoo_sync
+SYNC_PROCESSORS = {
+    'sale_order': '_process_sale_order',
+    'sale_orders_batch': '_process_sale_orders_batch',
+    'account_invoice': '_process_account_invoice',
+    'purchase_order': '_process_purchase_order',
+}
+
+
+class Odoo11SyncProcessor(models.AbstractModel):
+    """Traitement des données reçues d'Odoo11, hors requête HTTP : appelé par les routes
+    /odoo_sync en mode synchrone et par la file odoo11.sync.message en mode asynchrone."""
+    _name = 'odoo11.sync.processor'
+    _description = 'Traitement des synchronisations Odoo11'
+
+    @api.model
+    def _process(self, endpoint, data):
+        """Traite le contenu reçu sur un point d'entrée ; retourne la réponse"""
+        return getattr(self, SYNC_PROCESSORS[endpoint])(data)
+
+    @api.model
+    def _process_sale_order(self, data):
+        """Crée un SaleOrder reçu d'Odoo11 (idempotent) ; retourne la réponse renvoyée à l'expéditeur"""
+        try:
+            error = self._validate_sale_order_data(data)
+            if error:
+                return {"status": "error", "message": error}
+
+            # Idempotence : une relance du même contenu renvoie la réponse déjà calculée
+            Idempotency = self.env['odoo11.sync.idempotency'].sudo()
+            idempotency_key, payload_hash = Idempotency._make_key('sale.order', data.get('name'), data)
+            cached_response = Idempotency._get_response(idempotency_key)
+            if cached_response is not None:
+                _logger.info("SaleOrder %s déjà traité, réponse en cache renvoyée", data.get('name'))
+                return cached_response
+
+            # Réservation, commande et lignes dans un même savepoint : en cas d'erreur, le rollback
+            # libère la clé et n'enregistre pas de commande sans lignes ; une relance retraite tout
+            with self.env.cr.savepoint():
+                idempotency = Idempotency._reserve(idempotency_key, 'sale.order', data.get('name'), payload_hash)
+                if not idempotency:
+                    # Relance concurrente : nouvel essai à prévoir
+                    return Idempotency._get_concurrent_response(idempotency_key)
+
+                # Client, entrepôt et utilisateur via la table de correspondance Odoo11
+                partner = self._resolve_remote_record('res.partner', data['partner_id'], self._customer_vals)
+
+                warehouse = False
+                if data.get('warehouse_id'):
+                    warehouse = self._resolve_remote_record('stock.warehouse', data['warehouse_id'], self._warehouse_vals)
+
+                user = None
+                if data.get('user_id'):
+                    user = self._resolve_remote_record('res.users', data['user_id'])
+                if not user:
+                    user = self.env['res.users'].sudo().browse(SUPERUSER_ID)
+                    _logger.warning("Utilisateur non trouvé, utilisation admin : %s", user.login)
+
+                # Vérifier si le SaleOrder existe déjà (évite les doublons, index sale_order_name_sync_index)
+                sale_order = self.env['sale.order'].sudo().search([('name', '=', data['name'])], limit=1)
+                if sale_order:
+                    _logger.info("SaleOrder %s déjà existant, aucun doublon créé.", data['name'])
+                    response = {"status": "success", "sale_order_id": sale_order.id}
+                    idempotency._store_response(response, sale_order.id)
+                    return response
+
+                # Création du SaleOrder
+                sale_order_vals = self._prepare_sale_order_vals(data, partner, warehouse, user)
+                sale_order = self.env['sale.order'].sudo().create(sale_order_vals)
+                _logger.info("SaleOrder créé localement : %s", sale_order.name)
+
+                # Création des lignes de commande (produits réutilisés via la table de correspondance)
+                order_lines = data.get('order_lines_data', [])
+                products = self._resolve_sale_products(order_lines)
+                self.env['sale.order.line'].sudo().create([
+                    self._prepare_sale_order_line_vals(sale_order, line, products[line['product_id'][0]])
+                    for line in order_lines
+                ])
+
+                response = {"status": "success", "sale_order_id": sale_order.id}
+                idempotency._store_response(response, sale_order.id)
+                return response
+
+        except Exception as e:
+            _logger.exception("Erreur traitement SaleOrder : %s", e)
+            return {"status": "error", "message": str(e)}
+
+    @api.model
+    def _process_sale_orders_batch(self, data):
+        """Traite un lot de SaleOrder ({"orders": [...]}) ; retourne un statut par commande"""
+        orders = data.get('orders') if isinstance(data, dict) else None
+        if not isinstance(orders, list):
+            return {"status": "error", "message": "orders manquant dans la requête (liste attendue)"}
+        _logger.info("Lot de %d SaleOrder reçu", len(orders))
+
+        results = self._sync_sale_orders(orders)
+        created = sum(1 for result in results if result.get('status') == 'success')
+        _logger.info("Lot SaleOrder traité : %d/%d en succès", created, len(orders))
+        return {"status": "success", "results": results}
+
+    def _validate_sale_order_data(self, data):
+        """Valide un SaleOrder reçu ; retourne le message d'erreur ou False"""
+        if not isinstance(data, dict):
+            return "SaleOrder invalide : objet JSON attendu"
+        if not data.get("partner_id"):
+            return "partner_id manquant dans la requête"
+        if not data.get("name"):
+            return "name manquant dans la requête"
+        return False
+
+    def _prepare_sale_order_vals(self, data, partner, warehouse, user):
+        """Valeurs de création d'un SaleOrder"""
+        return {
+            'name': data['name'],
+            'partner_id': partner.id,
+            'user_id': user.id,
+            'amount_total': data.get('amount_total', 0),
+            'warehouse_id': warehouse.id if warehouse else False,
+            'project_name': data.get('project', False),
+        }
+
+    def _prepare_sale_order_line_vals(self, sale_order, line, product):
+        """Valeurs de création d'une ligne de SaleOrder"""
+        return {
+            'order_id': sale_order.id,
+            'product_id': product.id,
+            'product_uom_qty': line.get('product_uom_qty', 1),
+            'price_unit': line.get('price_unit', 0),
+            'name': line.get('name', 'Produit inconnu'),
+            'tax_id': line.get('taxes_id', []),
+        }
+
+    def _resolve_remote_records(self, model_name, refs, create_vals=None):
+        """Résout {id Odoo11: nom} via la table de correspondance ; retourne {id Odoo11: enregistrement}.
+
+        Sans create_vals, les enregistrements introuvables ne sont pas créés (absents du résultat).
+        """
+        if not refs:
+            return {}
+        return self.env['odoo11.sync.mapping'].sudo()._resolve(model_name, refs, create_vals)
+
+    def _resolve_remote_record(self, model_name, remote_data, create_vals=None):
+        """Enregistrement local pour une valeur Odoo11 [id, nom] (vide si introuvable)"""
+        remote_id, remote_name = remote_data
+        records = self._resolve_remote_records(model_name, {remote_id: remote_name}, create_vals)
+        return records.get(remote_id, self.env[model_name].sudo())
+
+    @staticmethod
+    def _customer_vals(name):
+        return {'name': name}
+
+    @staticmethod
+    def _supplier_vals(name):
+        return {
+            'name': name,
+            'company_type': 'company',
+            'supplier_rank': 1,
+        }
+
+    @staticmethod
+    def _warehouse_vals(name):
+        return {
+            'name': name,
+            'code': name[:5].upper(),
+        }
+
+    def _resolve_sale_products(self, lines):
+        """Produits locaux des lignes reçues : {id produit Odoo11: product.product}.
+
+        Un produit Odoo11 déjà synchronisé est réutilisé ; les autres sont associés à un
+        produit local de même nom ou créés en un seul create.
+        """
+        refs = {}
+        list_prices = {}
+        for line in lines:
+            product_id, product_name = line['product_id']
+            refs.setdefault(product_id, product_name)
+            list_prices.setdefault(product_name, line.get('price_unit', 0))
+        if not refs:
+            return {}
+        return self._resolve_remote_records('product.product', refs, lambda name: {
+            'name': name,
+            'list_price': list_prices.get(name, 0),
+        })
+
+    def _create_sale_orders(self, entries):
+        """Crée commandes et lignes en create groupés, produits résolus pour tout le lot.
+
+        entries : liste de (données reçues, valeurs de commande) ; retourne les commandes créées.
+        """
+        sale_orders = self.env['sale.order'].sudo().create([vals for _data, vals in entries])
+        order_lines = [
+            (sale_order, line)
+            for (data, _vals), sale_order in zip(entries, sale_orders)
+            for line in data.get('order_lines_data', [])
+        ]
+        products = self._resolve_sale_products([line for _order, line in order_lines])
+        self.env['sale.order.line'].sudo().create([
+            self._prepare_sale_order_line_vals(sale_order, line, products[line['product_id'][0]])
+            for sale_order, line in order_lines
+        ])
+        return sale_orders
+
+    def _sync_sale_orders(self, orders):
+        """Traite un lot de SaleOrder ; retourne un statut par commande, dans l'ordre reçu"""
+        Idempotency = self.env['odoo11.sync.idempotency'].sudo()
+        results = [None] * len(orders)
+
+        # Validation et idempotence
+        keys = {}
+        for index, data in enumerate(orders):
+            error = self._validate_sale_order_data(data)
+            if error:
+                results[index] = {"status": "error", "name": data.get('name') if isinstance(data, dict) else False, "message": error}
+                continue
+            keys[index] = Idempotency._make_key('sale.order', data['name'], data)
+        cached_responses = Idempotency._get_responses([key for key, _hash in keys.values()])
+
+        # Clés réservées sans réponse : toute erreur doit les libérer, sinon les relances
+        # seraient bloquées jusqu'à leur purge
+        pending = {}
+        try:
+            with self.env.cr.savepoint():
+                for index, (key, payload_hash) in keys.items():
+                    name = orders[index]['name']
+                    if key in cached_responses:
+                        results[index] = dict(cached_responses[key], name=name)
+                        continue
+                    idempotency = Idempotency._reserve(key, 'sale.order', name, payload_hash)
+                    if not idempotency:
+                        results[index] = dict(Idempotency._get_concurrent_response(key), name=name)
+                        continue
+                    pending[index] = idempotency
+                if pending:
+                    self._create_reserved_sale_orders(orders, pending, results)
+        except Exception as e:
+            _logger.exception("Erreur traitement lot SaleOrder : %s", e)
+            Idempotency.browse([idempotency.id for idempotency in pending.values()]).exists().unlink()
+            for index in keys:
+                if index in pending or results[index] is None:
+                    results[index] = {"status": "error", "name": orders[index]['name'], "message": str(e)}
+        return results
+
+    def _create_reserved_sale_orders(self, orders, pending, results):
+        """Crée les commandes dont la clé d'idempotence est réservée ({index: clé}) ; complète results"""
+        # Commandes déjà existantes ou en double dans le lot
+        names = {orders[index]['name'] for index in pending}
+        existing = {
+            order['name']: order['id']
+            for order in self.env['sale.order'].sudo().search_read([('name', 'in', list(names))], ['name'])
+        }
+        to_create = {}
+        batch_names = set()
+        for index, idempotency in pending.items():
+            name = orders[index]['name']
+            if name in existing:
+                response = {"status": "success", "sale_order_id": existing[name]}
+                idempotency._store_response(response, existing[name])
+                results[index] = dict(response, name=name)
+            elif name in batch_names:
+                results[index] = {"status": "error", "name": name, "message": "SaleOrder en double dans le lot"}
+                idempotency.unlink()
+            else:
+                batch_names.add(name)
+                to_create[index] = idempotency
+        if not to_create:
+            return
+
+        # Résolution groupée des partenaires, entrepôts et utilisateurs
+        batch = [orders[index] for index in to_create]
+        partners = self._resolve_remote_records(
+            'res.partner', {data['partner_id'][0]: data['partner_id'][1] for data in batch}, self._customer_vals)
+        warehouses = self._resolve_remote_records(
+            'stock.warehouse', {data['warehouse_id'][0]: data['warehouse_id'][1] for data in batch if data.get('warehouse_id')},
+            self._warehouse_vals)
+        users = self._resolve_remote_records(
+            'res.users', {data['user_id'][0]: data['user_id'][1] for data in batch if data.get('user_id')})
+        admin = self.env['res.users'].sudo().browse(SUPERUSER_ID)
+
+        entries = {}
+        for index in to_create:
+            data = orders[index]
+            warehouse = warehouses.get(data['warehouse_id'][0]) if data.get('warehouse_id') else False
+            user = users.get(data['user_id'][0]) if data.get('user_id') else None
+            entries[index] = (data, self._prepare_sale_order_vals(
+                data, partners[data['partner_id'][0]], warehouse, user or admin))
+
+        # Création groupée ; repli commande par commande pour isoler les erreurs
+        try:
+            with self.env.cr.savepoint():
+                created = dict(zip(entries, self._create_sale_orders(list(entries.values()))))
+        except Exception as e:
+            _logger.warning("Création groupée de %d SaleOrder impossible (%s), repli unitaire", len(entries), str(e))
+            created = {}
+            for index, entry in entries.items():
+                try:
+                    with self.env.cr.savepoint():
+                        created[index] = self._create_sale_orders([entry])
+                except Exception as e:
+                    _logger.error("Erreur création SaleOrder %s : %s", entry[0]['name'], str(e))
+                    results[index] = {"status": "error", "name": entry[0]['name'], "message": str(e)}
+                    to_create[index].unlink()
+
+        for index, sale_order in created.items():
+            response = {"status": "success", "sale_order_id": sale_order.id}
+            to_create[index]._store_response(response, sale_order.id)
+            results[index] = dict(response, name=sale_order.name)
+
+    @api.model
+    def _process_account_invoice(self, data):
+        """Crée une facture client reçue d'Odoo11"""
+        try:
+            # Vérif partenaire
+            if not data.get("partner_id"):
+                return {"status": "error", "message": "partner_id manquant dans la requête"}
+
+            partner = self._resolve_remote_record('res.partner', data['partner_id'], self._customer_vals)
+
+            # Utilisateur
+            user = False
+            if data.get('user_id'):
+                user = self._resolve_remote_record('res.users', data['user_id'])
+            if not user:
+                user = self.env['res.users'].sudo().browse(SUPERUSER_ID)
+                _logger.warning("Utilisateur non trouvé, utilisation admin : %s", user.login)
+
+            # Création de la facture
+            invoice_vals = {
+                'move_type': 'out_invoice',
+                'partner_id': partner.id,
+                'invoice_date': data.get('date_invoice', None),
+                'invoice_origin': data.get('origin', ''),
+                'amount_total': data.get('amount_total', 0),
+            }
+            invoice = self.env['account.move'].sudo().create(invoice_vals)
+            _logger.info("AccountInvoice créé localement : %s", invoice.name)
+
+            return {"status": "success", "invoice_id": invoice.id}
+
+        except Exception as e:
+            _logger.exception("Erreur traitement AccountInvoice : %s", e)
+            return {"status": "error", "message": str(e)}
+
+    @api.model
+    def _process_purchase_order(self, data):
+        """Traite et crée la commande d'achat dans Odoo 18"""
+        try:
+            # Rechercher le fournisseur
+            partner_id = self._find_partner(data.get('partner_id'))
+            if not partner_id:
+                return {"status": "error", "message": "Fournisseur non trouvé"}
+
+            # Vérifier si la commande existe déjà
+            existing_order = self.env['purchase.order'].sudo().search([
+                ('name', '=', data.get('name'))
+            ], limit=1)
+
+            if existing_order:
+                _logger.info("Commande existe déjà: %s", data.get('name'))
+                return {"status": "success", "message": "Commande déjà existante", "purchase_id": existing_order.id}
+
+            # Gérer le dossier
+            dossier_data = data.get('dossier_data', {})
+            dossier_name = self._extract_dossier_name(dossier_data)
+            ref_fp = dossier_data.get('ref_bc_customer', '')
+            client_info = dossier_data.get('client_id', False)
+            client_id = False
+            if client_info and isinstance(client_info, list):
+                client_id = self._find_partner(client_info)
+
+            # Préparer les valeurs pour la commande
+            order_vals = {
+                'name': data.get('name'),
+                'partner_id': partner_id,
+                'date_order': data.get('date_order'),
+                'partner_ref': data.get('partner_ref', ''),
+                'date_approve': data.get('date_approve'),
+                'currency_id': self._find_currency(data.get('currency_id')),
+                'notes': data.get('notes', ''),
+                'origin': f"Sync Odoo11: {data.get('name')}",
+                'company_id': self.env.company.id,
+                'ref_Fp': ref_fp,
+            }
+            if client_id:
+                order_vals['client_id'] = client_id
+
+            # Ajouter partner_ref s'il existe
+            if data.get('partner_ref'):
+                order_vals['partner_ref'] = data.get('partner_ref')
+
+            # Ajouter le dossier_id (nom du dossier)
+            if dossier_name:
+                order_vals['dossier_id'] = dossier_name
+
+            confirm_deferred = self._is_po_confirm_deferred()
+            if confirm_deferred:
+                order_vals['sync_confirm_pending'] = True
+
+            # Produits résolus avant la commande : un échec n'écarte que les lignes concernées
+            order_lines_data = data.get('order_lines_data', [])
+            product_ids = self._find_or_create_products([line_data.get('product_id') for line_data in order_lines_data])
+
+            # Créer la commande
+            purchase_order = self.env['purchase.order'].sudo().create(order_vals)
+
+            # Créer les lignes de commande (taxe résolue une fois pour toutes les lignes)
+            self._create_order_lines(purchase_order, order_lines_data, product_ids)
+
+            # Confirmer la commande, sauf confirmation différée (brouillon confirmé par le cron)
+            if not confirm_deferred:
+                purchase_order.button_confirm()
+
+            _logger.info("✅ Commande créée avec succès: %s (ID: %s, Dossier: %s)", purchase_order.name, purchase_order.id, dossier_name)
+
+            return {
+                "status": "success", 
+                "message": "Commande créée avec succès", 
+                "purchase_id": purchase_order.id,
+                "purchase_name": purchase_order.name,
+                "dossier_id": dossier_name
+            }
+
+        except Exception as e:
+            _logger.exception("Erreur traitement PurchaseOrder: %s", str(e))
+            return {"status": "error", "message": f"Erreur traitement: {str(e)}"}
+
+    @api.model
+    def _is_po_confirm_deferred(self):
+        value = self.env['ir.config_parameter'].sudo().get_param(DEFERRED_PO_CONFIRM_PARAM, 'False')
+        return value.strip().lower() in ('1', 'true', 'yes')
+
+    def _extract_dossier_name(self, dossier_data):
+        """Extrait le nom du dossier depuis les données"""
+        if not dossier_data:
+            return False
+
+        # Priorité: name, puis project_name
+        dossier_name = dossier_data.get('name')
+        if not dossier_name:
+            dossier_name = dossier_data.get('project_name')
+
+        return dossier_name
+
+    def _find_partner(self, partner_data):
+        """Trouve le fournisseur : table de correspondance pour [id, nom], sinon par nom"""
+        if not partner_data:
+            return False
+
+        if isinstance(partner_data, list) and len(partner_data) == 2:
+            return self._resolve_remote_record('res.partner', partner_data, self._supplier_vals).id
+
+        partner_name = partner_data[1] if isinstance(partner_data, list) else str(partner_data)
+
+        # Rechercher par nom exact
+        partner = self.env['res.partner'].sudo().search([
+            ('name', '=ilike', partner_name)
+        ], limit=1)
+
+        if not partner:
+            # Créer le fournisseur
+            partner = self.env['res.partner'].sudo().create(self._supplier_vals(partner_name))
+            _logger.info("Nouveau fournisseur créé: %s", partner_name)
+
+        return partner.id
+
+    def _company_currency_id(self):
+        """Devise de la société courante (cache par worker)"""
+        company = self.env.company
+        return LOOKUP_CACHE.get_or_compute(
+            self.env.cr.dbname, 'company', ('currency_id', company.id), lambda: company.currency_id.id)
+
+    def _find_currency(self, currency_data):
+        """Trouve la devise par nom (cache par worker)"""
+        if not currency_data:
+            return self._company_currency_id()
+
+        currency_name = currency_data[1] if isinstance(currency_data, list) else str(currency_data)
+        
+        # Rechercher la devise
+        currency_id = LOOKUP_CACHE.get_or_compute(
+            self.env.cr.dbname, 'currency', currency_name.strip().lower(),
+            lambda: self.env['res.currency'].sudo().search([('name', '=ilike', currency_name)], limit=1).id)
+
+        return currency_id or self._company_currency_id()
+
+    def _create_order_lines(self, purchase_order, lines_data, product_ids):
+        """Crée les lignes de commande d'achat en un seul create.
+
+        product_ids est aligné sur lines_data ; les lignes sans produit (création échouée) sont ignorées.
+        """
+        # Taxe d'achat identique pour toutes les lignes taxées : une seule recherche
+        purchase_tax = None
+        vals_list = []
+        for line_data, product_id in zip(lines_data, product_ids):
+            if not product_id:
+                _logger.error("Erreur création ligne commande: produit introuvable (%s)", line_data.get('product_id'))
+                continue
+            line_vals = {
+                'order_id': purchase_order.id,
+                'product_id': product_id,
+                'product_qty': line_data.get('product_qty', 1.0),
+                'price_unit': line_data.get('price_unit', 0.0),
+                'name': line_data.get('name', ''),
+                'date_planned': line_data.get('date_planned'),
+            }
+
+            # Gérer les taxes si disponibles
+            taxes_data = line_data.get('taxes_id')
+            if taxes_data and isinstance(taxes_data, list) and len(taxes_data) > 2 and taxes_data[2]:
+                if purchase_tax is None:
+                    # Chercher les taxes par nom (approximatif)
+                    purchase_tax = self.env['account.tax'].sudo().search([
+                        ('type_tax_use', '=', 'purchase')
+                    ], limit=1)
+                if purchase_tax:
+                    line_vals['taxes_id'] = [(6, 0, purchase_tax.ids)]
+            vals_list.append(line_vals)
+
+        OrderLine = self.env['purchase.order.line'].sudo()
+        if not vals_list:
+            return OrderLine
+        try:
+            with self.env.cr.savepoint():
+                return OrderLine.create(vals_list)
+        except Exception as e:
+            _logger.warning("Création groupée de %d lignes impossible (%s), repli ligne à ligne", len(vals_list), str(e))
+
+        order_lines = OrderLine
+        for line_vals in vals_list:
+            try:
+                with self.env.cr.savepoint():
+                    order_lines |= OrderLine.create(line_vals)
+            except Exception as e:
+                _logger.error("Erreur création ligne commande: %s", str(e))
+        return order_lines
+
+    def _find_or_create_products(self, products_data):
+        """Produits des lignes, dans l'ordre : noms distincts recherchés en une requête,
+        manquants créés en un seul create"""
+        Product = self.env['product.product'].sudo()
+        names = {}
+        for product_data in products_data:
+            if product_data:
+                product_name = product_data[1] if isinstance(product_data, list) else str(product_data)
+                names.setdefault(product_name.strip().lower(), product_name)
+
+        product_ids = {}
+        for chunk in split_every(PRODUCT_SEARCH_CHUNK_SIZE, names):
+            domain = expression.OR([[('name', '=ilike', key)] for key in chunk])
+            for product in Product.search_read(domain, ['name'], order='id'):
+                product_ids.setdefault((product['name'] or '').strip().lower(), product['id'])
+
+        missing = [key for key in names if key not in product_ids]
+        if missing:
+            product_ids.update(self._create_products({key: names[key] for key in missing}))
+
+        generic_product_id = None
+        result = []
+        for product_data in products_data:
+            if not product_data:
+                if generic_product_id is None:
+                    try:
+                        with self.env.cr.savepoint():
+                            generic_product_id = self._find_or_create_product(False)
+                    except Exception as e:
+                        _logger.error("Erreur création produit générique: %s", str(e))
+                        generic_product_id = False
+                result.append(generic_product_id)
+            else:
+                product_name = product_data[1] if isinstance(product_data, list) else str(product_data)
+                result.append(product_ids.get(product_name.strip().lower(), False))
+        return result
+
+    def _create_products(self, names):
+        """Crée les produits {clé: nom} en un seul create ; repli produit par produit.
+
+        Retourne {clé: id} pour les produits créés (les échecs sont absents).
+        """
+        Product = self.env['product.product'].sudo()
+        vals_by_key = {key: {
+            'name': name,
+            'type': 'service',  # ou 'product' selon le besoin
+            'purchase_ok': True,
+            'sale_ok': False,
+            'default_code': f"PROD_{name[:20]}",
+        } for key, name in names.items()}
+        try:
+            with self.env.cr.savepoint():
+                created = Product.create(list(vals_by_key.values()))
+            _logger.info("Nouveaux produits créés: %s", ', '.join(names.values()))
+            return dict(zip(vals_by_key, created.ids))
+        except Exception as e:
+            _logger.warning("Création groupée de %d produits impossible (%s), repli unitaire", len(names), str(e))
+
+        product_ids = {}
+        for key, vals in vals_by_key.items():
+            try:
+                with self.env.cr.savepoint():
+                    product_ids[key] = Product.create(vals).id
+                _logger.info("Nouveau produit créé: %s", names[key])
+            except Exception as e:
+                _logger.error("Erreur création produit '%s': %s", names[key], str(e))
+        return product_ids
+
+    def _find_or_create_product(self, product_data):
+        """Trouve ou crée un produit par nom"""
+        if not product_data:
+            # Retourner un produit générique si non spécifié (cache par worker)
+            generic_product_id = LOOKUP_CACHE.get_or_compute(
+                self.env.cr.dbname, 'generic_product', 'GENERIC',
+                lambda: self.env['product.product'].sudo().search([('default_code', '=', 'GENERIC')], limit=1).id)
+            generic_product = self.env['product.product'].sudo().browse(generic_product_id)
+            
+            if not generic_product:
+                generic_product = self.env['product.product'].sudo().create({
+                    'name': 'Produit Générique',
+                    'default_code': 'GENERIC',
+                    'type': 'service',
+                    'purchase_ok': True,
+                })
+                # Pas de mise en cache d'un produit créé dans une transaction non encore validée
+                LOOKUP_CACHE.invalidate(self.env.cr.dbname, 'generic_product')
+            return generic_product.id
+
+        product_name = product_data[1] if isinstance(product_data, list) else str(product_data)
+
+        # Rechercher par nom
+        product = self.env['product.product'].sudo().search([
+            ('name', '=ilike', product_name)
+        ], limit=1)
+
+        if not product:
+            # Créer le produit
+            product = self.env['product.product'].sudo().create({
+                'name': product_name,
+                'type': 'service',  # ou 'product' selon le besoin
+                'purchase_ok': True,
+                'sale_ok': False,
+                'default_code': f"PROD_{product_name[:20]}",
+            })
+            _logger.info("Nouveau produit créé: %s", product_name)
+
+        return product.id
@@ -1,18 +1,21 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
+from odoo.osv import expression
+from odoo.tools import float_is_zero, float_round, html2plaintext, mute_logger, split_every
 import base64
-import io
+import functools
 import logging
-from datetime import datetime
+import multiprocessing
+import tempfile
+from collections import defaultdict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
 import re 
+from psycopg2 import IntegrityError, errorcodes
 
-_logger = logging.getLogger(__name__)
+from .import_sources import _normalize_header, open_row_source
 
-try:
-    import openpyxl
-except ImportError:
-    _logger.warning("Le module openpyxl n'est pas installé. Installation requise: pip install openpyxl")
-    openpyxl = None
+_logger = logging.getLogger(__name__)
 
 # Mappage des colonnes du fichier Excel vers les champs Odoo
 COLUMN_MAPPING = {
@@ -44,16 +47,392 @@ COLUMN_MAPPING = {
 # Domaine d'e-mail factice pour les utilisateurs créés
 DEFAULT_USER_EMAIL_DOMAIN = 'neuronestech.com'
 
+# En-têtes normalisés (casse et espaces ignorés) -> champ Odoo
+NORMALIZED_COLUMN_MAPPING = {
+    ' '.join(excel_header.split()).lower(): odoo_field
+    for excel_header, odoo_field in COLUMN_MAPPING.items()
+}
+
+SELECTION_FIELDS = ('nature', 'bu', 'domaine', 'revenue_type', 'circuit', 'etat_projet')
+AMOUNT_FIELDS = ('cas_build', 'cas_run', 'cas_train', 'cas_sw', 'cas_hw', 'cas')
+
+# Libellés Excel acceptés pour les champs de sélection (comparaison sans casse)
+SELECTION_ALIASES = {
+    'nature': {
+        'livraison': 'livraison', 
+        'end to end': 'end_to_end',
+        'services pro': 'service_pro',
+        'service pro': 'service_pro',
+        'all': 'all',
+    },
+    'bu': {
+        'ict': 'ict', 
+        'cloud': 'cloud', 
+        'cybersecurity': 'cybersecurity',
+        'formation': 'formation', 
+        'security': 'security',
+    },
+    'revenue_type': { 
+        'recurrent': 'recurrent', 
+        'one shot': 'oneshot', 
+        'oneshot': 'oneshot',
+        'one-shot': 'oneshot',
+    },
+    'circuit': { 
+        'fast track': 'fast',
+        'fast': 'fast',
+        'normal': 'normal', 
+    },
+    'domaine': {
+        'datacenter facilities (dcf)': 'datacenter_facilities',
+        'modern network integration (mni)': 'modern_network_integration',
+        'agile infrastructure & cloud (aic)': 'agile_infrastructure_cloud',
+        'business data integration (bdi)': 'business_data_integration',
+        'digital workspace (dws)': 'digital_workspace',
+        'secured it (sec)': 'secured_it',
+        'expert & managed services - think': 'expert_managed_services_think',
+        'expert & managed services - build': 'expert_managed_services_build',
+        'expert & managed services - train': 'expert_managed_services_train',
+        'expert & managed services - run': 'expert_managed_services_run',
+        'none': 'none',
+        'others': 'others',
+    },
+    'etat_projet': { 
+        '0-annulé': 'cancelled', 
+        '1-non démarré': 'non_demarre', 
+        '2-en cours': 'en_cours_production', 
+        '3-en cours - provisionning': 'en_cours_provisionning', 
+        '4-en cours - livraison': 'en_cours_production',
+        '5-terminé - pv/bl signé': 'termine_pv_bl_signe',
+        '6-facturé - attente df': 'facture_attente_df', 
+        '7-cloturé': 'cloture', 
+        '8-suivi - contrat licence': 'suivi_contrat_licence', 
+        '8-suivi - contrat mixte': 'suivi_contrat_mixte', 
+        '8-suivi - contrat de services': 'suivi_contrat_services',
+        '9-suspendu': 'suspendu', 
+        'cloturé': 'cloture', 
+        'non démarré': 'non_demarre',
+        'en cours': 'en_cours_production', 
+        'terminé': 'termine_pv_bl_signe',
+        'facturé': 'facture_attente_df', 
+        'draft': 'draft', 
+        'suspendu': 'suspendu',
+        'cancelled': 'cancelled',
+    }
+}
+
+# Valeurs par défaut si non trouvé
+SELECTION_FALLBACKS = {
+    'nature': 'all', 
+    'bu': 'ict', 
+    'domaine': 'others',
+    'etat_projet': 'non_demarre', 
+    'revenue_type': 'oneshot', 
+    'circuit': 'normal'
+}
+
+# Champs Many2one résolus en masse avant le parcours des lignes
+RELATED_FIELD_MODELS = {
+    'user_id': 'res.users',
+    'am': 'res.users',
+    'presales': 'res.users',
+    'sc': 'res.users',
+    'partner_id': 'res.partner',
+    'pays': 'res.country',
+    'secteur': 'res.partner.category',
+}
+
+# Valeurs considérées comme vides dans le fichier
+EMPTY_VALUES = ('nan', 'none', 'n/a', 'na', '')
+EMPTY_USER_VALUES = EMPTY_VALUES + ('default',)
+
+# Nombre de logins essayés en cas de conflit d'unicité (import concurrent)
+LOGIN_ALLOCATION_ATTEMPTS = 5
+
+# Nombre de noms recherchés par requête lors de la résolution groupée
+PREFETCH_CHUNK_SIZE = 500
+
+# Nombre de projets créés/mis à jour par lot d'écriture
+IMPORT_BATCH_SIZE = 200
+
+# Nombre de résultats affichés dans le journal texte
+IMPORT_LOG_MAX_LINES = 500
+
+# Nombre de lignes traitées par exécution du cron d'import en arrière-plan
+BACKGROUND_ROWS_PER_RUN = 2000
+
+# Formats de date texte acceptés, par ordre de préférence
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%m/%d/%Y')
+# Nombre de valeurs texte échantillonnées pour déduire le format de la colonne Date IN
+DATE_SAMPLE_SIZE = 200
+# Nombre maximal de dates distinctes mémorisées par convertisseur
+DATE_CACHE_SIZE = 10000
+
+# Nombre de lignes envoyées à la fois à un processus de conversion
+PARALLEL_CHUNK_ROWS = 1000
+
+# Taille (octets) au-delà de laquelle le fichier décodé est déversé sur disque
+IMPORT_SPOOL_MAX_SIZE = 8 * 1024 * 1024
+# Taille des blocs base64 décodés (multiple de 4)
+IMPORT_DECODE_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def _normalize_name(value):
+    """ Clé de recherche insensible à la casse (équivalent Python de =ilike) """
+    return str(value or '').strip().lower()
+
+
+def _login_base(name):
+    """ Login de base (ex: Berenger ASSIELOU -> berenger.assielou) """
+    parts = re.findall(r'[a-zA-Z0-9]+', name.lower())
+    if len(parts) > 1:
+        login_base = ".".join(parts[:2])  # Prend seulement les 2 premières parties
+    elif len(parts) == 1:
+        login_base = parts[0]
+    else:
+        login_base = 'imported.user'
+    
+    # Nettoyer les caractères non alphanumériques sauf le point
+    login_base = re.sub(r'[^a-z0-9\.]', '', login_base)
+    
+    if not login_base or len(login_base) < 3:
+        login_base = 'imported.user'
+    return login_base
+
+
+def _empty_values(model_name):
+    """ Valeurs à ignorer pour un modèle lié """
+    return EMPTY_USER_VALUES if model_name == 'res.users' else EMPTY_VALUES
+
+
+def _match_columns(headers):
+    """ Associe chaque champ Odoo à l'index de la première colonne correspondante du fichier """
+    columns = {}
+    for col_index, header in enumerate(headers):
+        odoo_field = NORMALIZED_COLUMN_MAPPING.get(_normalize_header(header))
+        if odoo_field:
+            columns.setdefault(odoo_field, col_index)
+    return columns
+
+
+def _build_selection_lookups():
+    """ Tables de correspondance normalisées, construites une fois au chargement du module """
+    return {
+        field_name: {_normalize_name(excel_val): odoo_val for excel_val, odoo_val in aliases.items()}
+        for field_name, aliases in SELECTION_ALIASES.items()
+    }
+
+
+_SELECTION_LOOKUPS = _build_selection_lookups()
+
+
+def register_selection_aliases(field_name, aliases):
+    """ Ajoute des libellés Excel acceptés pour un champ de sélection.
+
+    Ex: register_selection_aliases('bu', {'cyber': 'cybersecurity'})
+    """
+    lookup = _SELECTION_LOOKUPS.setdefault(field_name, {})
+    for excel_val, odoo_val in aliases.items():
+        lookup[_normalize_name(excel_val)] = odoo_val
+
+
+# Enregistrement qui serait créé (mode simulation) ; remplace l'id dans les valeurs
+PendingRecord = namedtuple('PendingRecord', ['model', 'name'])
+
+
+class InvalidCellValue(ValueError):
+    """ Cellule non interprétable ; fallback est la valeur retenue à la place (None : champ ignoré) """
+
+    def __init__(self, value, fallback=None):
+        super().__init__(value)
+        self.value = value
+        self.fallback = fallback
+
+
+# --- CONVERTISSEURS DE CELLULES (valeur Odoo, ou None pour ignorer la cellule) ---
+
+def _convert_text(value):
+    return str(value).strip()
+
+
+def _convert_related_key(model_name, value):
+    """ Many2one (PM, AM, Presales, SC, Pays, Customer, Secteur) : clé normalisée, résolue ensuite en id """
+    key = _normalize_name(value)
+    return None if key in _empty_values(model_name) else key
+
+
+def _convert_selection(lookup, fallback, value):
+    """ Champs de sélection : un seul accès dictionnaire, valeur par défaut si libellé inconnu """
+    key = _normalize_name(value)
+    if key in EMPTY_VALUES:
+        return None
+    return lookup.get(key) or fallback or str(value).strip()
+
+
+def _parse_date(value, fmt):
+    """ Date au format Odoo, ou None si value ne respecte pas fmt """
+    try:
+        return datetime.strptime(value, fmt).strftime('%Y-%m-%d')
+    except ValueError:
+        return None
+
+
+def _infer_date_format(samples):
+    """ Format de DATE_FORMATS reconnaissant le plus de valeurs de l'échantillon.
+
+    À égalité (ex: dates toutes ambiguës entre JJ/MM et MM/JJ), l'ordre de DATE_FORMATS prévaut.
+    """
+    best_format, best_count = DATE_FORMATS[0], 0
+    for fmt in DATE_FORMATS:
+        count = sum(1 for value in samples if _parse_date(value, fmt))
+        if count > best_count:
+            best_format, best_count = fmt, count
+    return best_format
+
+
+class DateParser:
+    """ Convertisseur de la colonne Date IN : format fixe déduit d'un échantillon, avec mémo.
+
+    Une valeur texte qui ne respecte pas le format détecté est signalée ; elle est tout de même
+    importée si un autre format de DATE_FORMATS la reconnaît.
+    """
+
+    def __init__(self, fmt):
+        self.fmt = fmt
+        self.cache = {}
+
+    def _parse(self, value):
+        parsed = _parse_date(value, self.fmt)
+        if parsed:
+            return parsed, True
+        for fmt in DATE_FORMATS:
+            if fmt != self.fmt:
+                parsed = _parse_date(value, fmt)
+                if parsed:
+                    return parsed, False
+        return None, False
+
+    def __call__(self, value):
+        if isinstance(value, date):
+            return value.strftime('%Y-%m-%d')
+        if not isinstance(value, str):
+            raise InvalidCellValue(value)
+        value = value.strip()
+        result = self.cache.get(value)
+        if result is None:
+            result = self._parse(value)
+            if len(self.cache) < DATE_CACHE_SIZE:
+                self.cache[value] = result
+        parsed, matches_format = result
+        if not matches_format:
+            raise InvalidCellValue(value, parsed)
+        return parsed
+
+
+def _convert_amount(value):
+    """ Champs monétaires (CAS) ; une valeur non interprétable est importée à 0.0 """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        cleaned_value = re.sub(r'[^\d\.\,]', '', value)
+        if not cleaned_value and _normalize_name(value) in EMPTY_VALUES:
+            return 0.0
+        try:
+            return float(cleaned_value.replace(',', '.'))
+        except ValueError:
+            pass
+    raise InvalidCellValue(value, 0.0)
+
+
+def _convert_row(column_plan, row):
+    """ Convertit une ligne brute sans accès base : (valeurs, [(champ, valeur non reconnue)]) """
+    values = {}
+    issues = []
+    for col_index, odoo_field, converter in column_plan:
+        # En mode read-only, les cellules vides de fin de ligne sont absentes
+        cell_value = row[col_index] if col_index < len(row) else None
+        if cell_value is None or (isinstance(cell_value, str) and not cell_value.strip()):
+            continue
+        try:
+            value = converter(cell_value)
+        except InvalidCellValue as invalid:
+            value = invalid.fallback
+            issues.append((odoo_field, cell_value))
+        if value is not None:
+            values[odoo_field] = value
+    return values, issues
+
+
+def _convert_indexed_row(column_plan, indexed_row):
+    """ (n° de ligne, valeurs, anomalies, message d'erreur ou None) """
+    row_index, row = indexed_row
+    try:
+        values, issues = _convert_row(column_plan, row)
+        return row_index, values, issues, None
+    except Exception as e:
+        return row_index, {}, [], str(e)
+
+
+def _convert_rows(column_plan, indexed_rows):
+    """ Conversion d'un bloc de lignes, exécutée dans un processus du pool """
+    return [_convert_indexed_row(column_plan, indexed_row) for indexed_row in indexed_rows]
+
+
+def _comparable_value(value):
+    """ Valeur lue (read) ramenée à la forme des valeurs importées """
+    if isinstance(value, tuple):
+        return value[0]
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+
+def _comparable_html(value):
+    """ Texte d'un champ Html (lu : HTML nettoyé, importé : texte brut), espaces normalisés """
+    return ' '.join(html2plaintext(value or '').split())
+
+
+def _diff_values(current, values, html_fields=()):
+    """ Champs dont la valeur importée diffère de la valeur actuelle : {champ: (ancienne, nouvelle)}
+
+    Les champs Html (html_fields) sont comparés sur leur texte : read() renvoie le HTML nettoyé
+    (<p>texte</p>) alors que l'import fournit du texte brut.
+    """
+    changes = {}
+    for field_name, new_value in values.items():
+        old_value = current.get(field_name, False)
+        old_comparable = _comparable_value(old_value)
+        if field_name in html_fields:
+            if _comparable_html(old_comparable) == _comparable_html(new_value):
+                continue
+        elif isinstance(new_value, float) and isinstance(old_comparable, (int, float)):
+            if float_is_zero(new_value - old_comparable, precision_digits=2):
+                continue
+        elif old_comparable == new_value:
+            continue
+        changes[field_name] = (old_value, new_value)
+    return changes
+
 
 class ProjectImportWizard(models.TransientModel):
     _name = 'project.import.wizard'
     _description = "Wizard d'import de projets depuis Excel"
+    # Les imports en file d'attente doivent survivre au nettoyage des enregistrements transitoires
+    _transient_max_hours = 48.0
 
     import_file = fields.Binary(
-        string='Fichier Excel',
+        string='Fichier Excel ou CSV',
         required=True
     )
     import_filename = fields.Char(string='Nom du fichier')
+    sheet_name = fields.Char(
+        string='Feuille',
+        help="Nom de la feuille à importer (classeur .xlsx) ; vide : feuille active"
+    )
+    all_sheets = fields.Boolean(
+        string='Toutes les feuilles',
+        help="Importe toutes les feuilles du classeur ; chaque feuille commence par sa ligne d'en-têtes"
+    )
     
     update_existing = fields.Boolean(
         string='Mettre à jour les projets existants',
@@ -69,258 +448,818 @@ class ProjectImportWizard(models.TransientModel):
         help="Si activé, crée automatiquement les utilisateurs, clients et autres enregistrements manquants"
     )
     
-    import_log = fields.Text(string="Journal d'import", readonly=True)
-    success_count = fields.Integer(string='Projets créés/mis à jour', readonly=True)
-    error_count = fields.Integer(string='Erreurs', readonly=True)
+    result_line_ids = fields.One2many('project.import.wizard.line', 'wizard_id', string="Résultats par ligne", readonly=True)
+    import_log = fields.Text(string="Journal d'import", compute='_compute_import_log')
+    success_count = fields.Integer(string='Projets créés/mis à jour', compute='_compute_result_counts')
+    error_count = fields.Integer(string='Erreurs', compute='_compute_result_counts')
     created_users_count = fields.Integer(string='Utilisateurs créés', readonly=True)
     created_partners_count = fields.Integer(string='Clients créés', readonly=True)
     created_categories_count = fields.Integer(string='Catégories créées', readonly=True)
 
+    dry_run = fields.Boolean(
+        string='Simulation',
+        readonly=True,
+        help="Import simulé : les lignes sont résolues et comparées aux projets existants sans rien écrire"
+    )
+    to_create_count = fields.Integer(string='Projets à créer', compute='_compute_result_counts')
+    to_update_count = fields.Integer(string='Projets à mettre à jour', compute='_compute_result_counts')
+    unchanged_count = fields.Integer(string='Projets inchangés', compute='_compute_result_counts')
+    invalid_value_count = fields.Integer(string='Lignes avec valeurs invalides', compute='_compute_result_counts')
+
+    commit_chunks = fields.Boolean(
+        string='Valider par lots',
+        default=False,
+        help="Si activé, chaque lot de lignes est validé en base : une erreur tardive ne perd que le lot en cours "
+             "et l'import peut être repris depuis le dernier point de reprise"
+    )
+    chunk_size = fields.Integer(string='Lignes par lot', default=500)
+    import_state = fields.Selection([
+        ('draft', 'Brouillon'),
+        ('queued', "En file d'attente"),
+        ('in_progress', 'En cours'),
+        ('done', 'Terminé'),
+        ('failed', 'Échec'),
+    ], string="État de l'import", default='draft', readonly=True)
+    background_job = fields.Boolean(string='Import en arrière-plan', readonly=True)
+    last_committed_row = fields.Integer(
+        string='Dernière ligne validée',
+        readonly=True,
+        help="Numéro de la dernière ligne du fichier enregistrée ; la reprise continue à la ligne suivante"
+    )
+    date_in_format = fields.Char(
+        string='Format de Date IN',
+        readonly=True,
+        help="Format de date déduit au premier passage, réutilisé par les reprises"
+    )
+    parallel_workers = fields.Integer(
+        string='Processus de conversion',
+        default=0,
+        help="Nombre de processus répartissant la conversion des lignes (dates, montants, sélections) ; "
+             "0 ou 1 : conversion dans le worker. Seules la résolution et l'écriture en base restent dans le worker."
+    )
+
+    # --- PROGRESSION ---
+    total_rows = fields.Integer(string='Lignes à traiter', readonly=True)
+    processed_rows = fields.Integer(string='Lignes traitées', readonly=True)
+    import_started_at = fields.Datetime(string="Début de l'import", readonly=True)
+    progress = fields.Float(string='Progression (%)', compute='_compute_progress_stats')
+    rows_per_second = fields.Float(string='Lignes/seconde', compute='_compute_progress_stats')
+    eta = fields.Datetime(string='Fin estimée', compute='_compute_progress_stats')
+
+    @api.depends('result_line_ids.action', 'result_line_ids.error_code')
+    def _compute_result_counts(self):
+        counts = defaultdict(int)
+        groups = self.env['project.import.wizard.line']._read_group(
+            [('wizard_id', 'in', self.ids)], ['wizard_id', 'action', 'error_code'], ['__count'],
+        )
+        for wizard, action, error_code, count in groups:
+            counts[wizard.id, action] += count
+            if error_code == 'invalid_value':
+                counts[wizard.id, 'invalid_value'] += count
+        for wizard in self:
+            wizard.success_count = counts[wizard.id, 'created'] + counts[wizard.id, 'updated']
+            wizard.error_count = counts[wizard.id, 'error']
+            wizard.to_create_count = counts[wizard.id, 'to_create']
+            wizard.to_update_count = counts[wizard.id, 'to_update']
+            wizard.unchanged_count = counts[wizard.id, 'unchanged']
+            wizard.invalid_value_count = counts[wizard.id, 'invalid_value']
+
+    @api.depends('result_line_ids', 'import_state')
+    def _compute_import_log(self):
+        """ Rendu texte borné du journal : les IMPORT_LOG_MAX_LINES premiers résultats puis le résumé """
+        Line = self.env['project.import.wizard.line']
+        for wizard in self:
+            if not wizard.id:
+                wizard.import_log = False
+                continue
+            lines = Line.search([('wizard_id', '=', wizard.id)], limit=IMPORT_LOG_MAX_LINES)
+            log = [line.message for line in lines]
+            hidden_count = Line.search_count([('wizard_id', '=', wizard.id)]) - len(lines)
+            if hidden_count > 0:
+                log.append(_("... %d lignes supplémentaires (voir les résultats par ligne)" % hidden_count))
+            if wizard.import_state == 'done' and wizard.dry_run:
+                log += [
+                    "",
+                    _("--- SIMULATION (aucune donnée enregistrée) ---"),
+                    _("Projets à créer: %d" % wizard.to_create_count),
+                    _("Projets à mettre à jour: %d" % wizard.to_update_count),
+                    _("Projets inchangés: %d" % wizard.unchanged_count),
+                    _("Utilisateurs à créer: %d" % wizard.created_users_count),
+                    _("Clients à créer: %d" % wizard.created_partners_count),
+                    _("Catégories à créer: %d" % wizard.created_categories_count),
+                    _("Lignes avec dates/montants invalides: %d" % wizard.invalid_value_count),
+                    _("Total Erreurs: %d" % wizard.error_count),
+                ]
+            elif wizard.import_state == 'done':
+                log += [
+                    "",
+                    "--- RÉSUMÉ ---",
+                    _("Total Projets importés/mis à jour: %d" % wizard.success_count),
+                    _("Total Projets inchangés (écriture ignorée): %d" % wizard.unchanged_count),
+                    _("Total Erreurs: %d" % wizard.error_count),
+                    _("Total Utilisateurs créés: %d" % wizard.created_users_count),
+                    _("Total Clients créés: %d" % wizard.created_partners_count),
+                    _("Total Catégories créées: %d" % wizard.created_categories_count),
+                ]
+            wizard.import_log = "\n".join(log)
+
+    @api.depends('total_rows', 'processed_rows', 'import_started_at', 'import_state')
+    def _compute_progress_stats(self):
+        now = fields.Datetime.now()
+        for wizard in self:
+            wizard.progress = 0.0
+            wizard.rows_per_second = 0.0
+            wizard.eta = False
+            if wizard.total_rows:
+                wizard.progress = float_round(100.0 * wizard.processed_rows / wizard.total_rows, precision_digits=1)
+            if not wizard.import_started_at or not wizard.processed_rows:
+                continue
+            elapsed = (now - wizard.import_started_at).total_seconds()
+            if elapsed <= 0:
+                continue
+            rate = wizard.processed_rows / elapsed
+            wizard.rows_per_second = float_round(rate, precision_digits=1)
+            remaining = wizard.total_rows - wizard.processed_rows
+            if wizard.import_state in ('queued', 'in_progress') and remaining > 0:
+                wizard.eta = now + timedelta(seconds=remaining / rate)
+
+    # --- JOURNAL DES RÉSULTATS ---
+
+    def _log_results(self, vals_list):
+        """ Enregistre immédiatement des résultats hors parcours des lignes (création liée, reprise...) """
+        self.env['project.import.wizard.line'].create([
+            dict(vals, wizard_id=self.id) for vals in vals_list
+        ])
+
+    def _add_row_result(self, batch, row_index, project_name, action, message, error_code=False, details=None):
+        """ Ajoute le résultat d'une ligne au tampon, écrit en masse au prochain point de reprise.
+
+        Les valeurs non interprétées de la ligne sont ajoutées aux détails.
+        """
+        details = list(details or [])
+        issues = batch['row_issues'].pop(row_index, None)
+        if issues:
+            details += issues
+            error_code = error_code or 'invalid_value'
+        batch['results'].append({
+            'wizard_id': self.id,
+            'row_index': row_index,
+            'project_name': project_name,
+            'action': action,
+            'error_code': error_code,
+            'message': message,
+            'details': "\n".join(details) or False,
+        })
+
+    def _flush_results(self, batch):
+        """ Écrit en un seul appel les résultats de lignes accumulés """
+        if batch['results']:
+            self.env['project.import.wizard.line'].create(batch['results'])
+            batch['results'].clear()
+
     # --- MÉTHODES DE GESTION DES ENREGISTREMENTS EXTERNES ---
-    
-    def _find_or_create_user(self, name):
-        """ Recherche ou crée un utilisateur avec gestion des doublons et login unique """
+
+    def _collect_related_names(self, headers, resume_after=1, last_row=None):
+        """ Premier passage : collecte les noms distincts à résoudre par modèle lié.
+
+        Seules les lignes traitées par l'exécution courante sont lues (resume_after < ligne <= last_row) :
+        une reprise ne relit pas les noms déjà résolus et s'arrête à la fin de sa tranche.
+        Renvoie {modèle: {nom normalisé: nom d'origine}} ; la première orthographe
+        rencontrée est conservée pour la création. Les noms de projets de la tranche
+        sont collectés sous 'project.project' pour l'index des projets existants.
+        """
+        matched_columns = _match_columns(headers)
+        columns = [
+            (col_index, RELATED_FIELD_MODELS[odoo_field])
+            for odoo_field, col_index in matched_columns.items()
+            if odoo_field in RELATED_FIELD_MODELS and self.create_missing_records
+        ]
+        name_col = matched_columns.get('name')
+        names = {model_name: {} for model_name in set(RELATED_FIELD_MODELS.values()) | {'project.project'}}
+        if not columns and name_col is None:
+            return names
+
+        rows = self._iter_import_rows()
+        try:
+            next(rows, None)
+            for row_index, row in enumerate(rows, start=2):
+                if row_index <= resume_after:
+                    continue
+                if last_row and row_index > last_row:
+                    break
+                for col_index, model_name in columns:
+                    cell_value = row[col_index] if col_index < len(row) else None
+                    key = _normalize_name(cell_value)
+                    if key in _empty_values(model_name):
+                        continue
+                    names[model_name].setdefault(key, str(cell_value).strip())
+                if name_col is not None and name_col < len(row) and row[name_col] not in (None, ''):
+                    project_name = _convert_text(row[name_col])
+                    names['project.project'][project_name] = project_name
+        finally:
+            rows.close()
+        return names
+
+    def _prefetch_related_records(self, names):
+        """ Résout en masse les utilisateurs, clients, pays et secteurs collectés (_collect_related_names).
+
+        Renvoie {modèle: {nom normalisé: id}} ; le parcours des lignes n'effectue
+        ensuite plus aucune recherche.
+        """
+        lookups = {model_name: {} for model_name in set(RELATED_FIELD_MODELS.values())}
         if not self.create_missing_records:
-            return False
-            
-        name = str(name or '').strip()
-        if not name or name.lower() in ('nan', 'none', 'default', 'n/a', 'na', ''):
-            return False
+            return lookups
 
-        User = self.env['res.users'].sudo()
-        
-        # Recherche plus large pour éviter les doublons
-        user = User.search([
-            '|', ('name', '=ilike', name),
-            '|', ('login', '=ilike', name),
-            '|', ('email', '=ilike', name),
-            ('partner_id.name', '=ilike', name)
-        ], limit=1)
-        
-        if user:
-            return user.id
+        lookups['res.users'] = self._resolve_users(names['res.users'])
+        lookups['res.partner'] = self._resolve_partners(names['res.partner'])
+        lookups['res.country'] = self._resolve_misc('res.country', names['res.country'])
+        lookups['res.partner.category'] = self._resolve_misc('res.partner.category', names['res.partner.category'])
 
+        if self.dry_run:
+            self._log_results([
+                {'action': 'info', 'message': _("À créer (%s): %s" % (record.model, record.name))}
+                for lookup in lookups.values()
+                for record in lookup.values()
+                if isinstance(record, PendingRecord)
+            ])
+        return lookups
+
+    def _search_by_names(self, model_name, names, name_fields, domain_filter=None, fields_to_read=None):
+        """ Recherche par blocs les enregistrements dont un des champs vaut (=ilike) un des noms """
+        Model = self.env[model_name].sudo()
+        records = []
+        for chunk in split_every(PREFETCH_CHUNK_SIZE, list(names)):
+            domain = expression.OR([
+                [(field_name, '=ilike', name)]
+                for name in chunk
+                for field_name in name_fields
+            ])
+            if domain_filter:
+                domain = expression.AND([domain, domain_filter])
+            records += Model.search_read(domain, fields_to_read or list(name_fields))
+        return records
+
+    def _create_in_bulk(self, model_name, vals_list, label, on_error=None):
+        """ Crée les enregistrements en un seul appel ; repli ligne à ligne en cas d'erreur.
+
+        on_error(index, erreur) remplace la journalisation par défaut des échecs unitaires.
+        Les enregistrements créés sont renvoyés dans l'ordre de vals_list, sans les échecs.
+        """
+        Model = self.env[model_name].sudo()
+        if not vals_list:
+            return Model
         try:
-            # Création du login de base (ex: Berenger ASSIELOU -> berenger.assielou)
-            parts = re.findall(r'[a-zA-Z0-9]+', name.lower())
-            if len(parts) > 1:
-                login_base = ".".join(parts[:2])  # Prend seulement les 2 premières parties
-            elif len(parts) == 1:
-                login_base = parts[0]
-            else:
-                login_base = 'imported.user'
-            
-            # Nettoyer les caractères non alphanumériques sauf le point
-            login_base = re.sub(r'[^a-z0-9\.]', '', login_base)
-            
-            if not login_base or len(login_base) < 3:
-                login_base = 'imported.user'
-                
-            login_candidate = login_base
-            login_suffix = 0
-            
-            # Garantir l'unicité du login
-            while User.search([('login', '=', login_candidate)], limit=1):
-                login_suffix += 1
-                login_candidate = f"{login_base}.{login_suffix}"
-            
-            # CRÉATION CRITIQUE : Créer d'abord le partenaire
-            Partner = self.env['res.partner'].sudo()
-            partner_vals = {
-                'name': name,
-                'is_company': False,
-                'company_type': 'person',
-                'email': f'{login_candidate}@{DEFAULT_USER_EMAIL_DOMAIN}',
-            }
-            new_partner = Partner.create(partner_vals)
-            
-            # Puis créer l'utilisateur avec le partenaire
-            user_vals = {
-                'name': name,
-                'login': login_candidate,
-                'email': f'{login_candidate}@{DEFAULT_USER_EMAIL_DOMAIN}',
-                'partner_id': new_partner.id,
-                'company_id': self.env.company.id,
-                'company_ids': [(6, 0, [self.env.company.id])],
-                'notification_type': 'email',
-                'groups_id': [(6, 0, [self.env.ref('base.group_user').id])]
-            }
-            
-            new_user = User.create(user_vals)
-            self.created_users_count += 1 
-            _logger.info(f"Utilisateur créé: {name} (login: {login_candidate})")
-            return new_user.id
-            
+            with self.env.cr.savepoint():
+                return Model.create(vals_list)
         except Exception as e:
-            _logger.error("Erreur recherche/création res.users '%s': %s", name, str(e))
-            self.import_log += _("Erreur: Impossible de créer l'utilisateur '%s': %s\n" % (name, str(e)))
-            return False
+            _logger.warning("Création groupée %s impossible (%s), repli unitaire", model_name, str(e))
 
-    def _find_or_create_partner(self, name):
-        """ Recherche ou crée un partenaire (Client) avec gestion des doublons """
-        if not self.create_missing_records:
-            return False
-            
-        name = str(name or '').strip()
-        if not name or name.lower() in ('nan', 'none', 'n/a', 'na', ''):
-            return False
-            
-        Partner = self.env['res.partner'].sudo()
-        
-        # Recherche avec différentes stratégies pour éviter les doublons
-        domain = [
-            ('name', '=ilike', name),
-            ('is_company', '=', True)
-        ]
-        partner = Partner.search(domain, limit=1)
-        
-        if not partner:
-            # Recherche plus large
-            partner = Partner.search([
-                '|', ('name', '=ilike', name),
-                ('commercial_company_name', '=ilike', name),
-                ('is_company', '=', True)
-            ], limit=1)
-        
-        if partner:
-            return partner.id
-            
+        records = Model
+        for index, vals in enumerate(vals_list):
+            try:
+                with self.env.cr.savepoint():
+                    records |= Model.create(vals)
+            except Exception as e:
+                if on_error:
+                    on_error(index, e)
+                    continue
+                _logger.error("Erreur création %s '%s': %s", model_name, vals.get('name'), str(e))
+                self._log_results([{
+                    'action': 'error',
+                    'error_code': 'related_create_failed',
+                    'message': _("Erreur: Impossible de créer %s '%s': %s" % (label, vals.get('name'), str(e))),
+                }])
+        return records
+
+    def _resolve_users(self, names):
+        """ Résout les utilisateurs par nom, login ou e-mail et crée les manquants """
+        lookup = {}
+        for user in self._search_by_names('res.users', names, ('name', 'login', 'email')):
+            for field_name in ('name', 'login', 'email'):
+                key = _normalize_name(user[field_name])
+                if key in names:
+                    lookup.setdefault(key, user['id'])
+
+        missing = {key: name for key, name in names.items() if key not in lookup}
+        if self.dry_run:
+            for key, name in missing.items():
+                lookup[key] = PendingRecord('res.users', name)
+            self.created_users_count += len(missing)
+        else:
+            lookup.update(self._create_users(missing))
+        return lookup
+
+    def _allocate_login(self, login_base, login_state):
+        """ Login libre pour login_base sans boucle de recherche.
+
+        Au premier usage d'une base, une seule requête (login =like base%) détermine le plus
+        grand suffixe utilisé ; login_state conserve ensuite le prochain suffixe pour l'import.
+        """
+        if login_base not in login_state:
+            User = self.env['res.users'].sudo().with_context(active_test=False)
+            suffix_pattern = re.compile(r'^%s(?:\.(\d+))?$' % re.escape(login_base))
+            used_suffixes = []
+            for user in User.search_read([('login', '=like', f'{login_base}%')], ['login']):
+                match = suffix_pattern.match(user['login'] or '')
+                if match:
+                    used_suffixes.append(int(match.group(1) or 0))
+            login_state[login_base] = max(used_suffixes) + 1 if used_suffixes else 0
+
+        login_suffix = login_state[login_base]
+        login_state[login_base] = login_suffix + 1
+        return f"{login_base}.{login_suffix}" if login_suffix else login_base
+
+    def _prepare_user_vals(self, name, login, partner_id, group_ids):
+        """ Valeurs de création d'un utilisateur interne importé """
+        return {
+            'name': name,
+            'login': login,
+            'email': f'{login}@{DEFAULT_USER_EMAIL_DOMAIN}',
+            'partner_id': partner_id,
+            'company_id': self.env.company.id,
+            'company_ids': [(6, 0, [self.env.company.id])],
+            'notification_type': 'email',
+            'groups_id': [(6, 0, group_ids)]
+        }
+
+    def _create_users(self, names):
+        """ Crée tous les utilisateurs manquants en un seul appel (partenaires compris).
+
+        La création d'utilisateurs recalcule les droits d'accès et invalide les caches du
+        registre : un seul create(vals_list) le fait une fois pour tout le lot. En cas
+        d'échec du lot, repli utilisateur par utilisateur.
+        Retourne {nom normalisé: id utilisateur} (False si la création a échoué).
+        """
+        if not names:
+            return {}
+        login_state = {}
+        logins = {key: self._allocate_login(_login_base(name), login_state) for key, name in names.items()}
+        group_ids = [self.env.ref('base.group_user').id]
         try:
-            new_partner = Partner.create({
-                'name': name,
-                'is_company': True,
-                'company_type': 'company',
-            })
-            self.created_partners_count += 1
-            _logger.info(f"Partenaire créé: {name}")
-            return new_partner.id
+            with mute_logger('odoo.sql_db'), self.env.cr.savepoint():
+                partners = self.env['res.partner'].sudo().create([{
+                    'name': name,
+                    'is_company': False,
+                    'company_type': 'person',
+                    'email': f'{logins[key]}@{DEFAULT_USER_EMAIL_DOMAIN}',
+                } for key, name in names.items()])
+                users = self.env['res.users'].sudo().create([
+                    self._prepare_user_vals(name, logins[key], partner.id, group_ids)
+                    for (key, name), partner in zip(names.items(), partners)
+                ])
+                users.flush_recordset()
         except Exception as e:
-            _logger.error("Erreur recherche/création res.partner '%s': %s", name, str(e))
-            self.import_log += _("Erreur: Impossible de créer le partenaire '%s': %s\n" % (name, str(e)))
-            return False
+            _logger.warning("Création groupée de %d utilisateurs impossible (%s), repli unitaire", len(names), str(e))
+            # Les logins alloués ont été annulés avec le savepoint : nouvelle allocation
+            login_state = {}
+            return {key: self._create_user(name, login_state) for key, name in names.items()}
 
-    def _find_or_create_misc(self, model_name, name, domain_filter=None):
-        """ Recherche ou crée d'autres enregistrements avec gestion des doublons """
-        if not self.create_missing_records:
-            return False
+        self.created_users_count += len(users)
+        _logger.info(f"{len(users)} utilisateurs créés: {', '.join(users.mapped('login'))}")
+        return dict(zip(names, users.ids))
+
+    def _create_user(self, name, login_state):
+        """ Crée un utilisateur interne (et son partenaire) avec un login unique """
+        User = self.env['res.users'].sudo()
+        try:
+            login_base = _login_base(name)
+            for _attempt in range(LOGIN_ALLOCATION_ATTEMPTS):
+                login_candidate = self._allocate_login(login_base, login_state)
+                try:
+                    with mute_logger('odoo.sql_db'), self.env.cr.savepoint():
+                        # CRÉATION CRITIQUE : Créer d'abord le partenaire
+                        Partner = self.env['res.partner'].sudo()
+                        partner_vals = {
+                            'name': name,
+                            'is_company': False,
+                            'company_type': 'person',
+                            'email': f'{login_candidate}@{DEFAULT_USER_EMAIL_DOMAIN}',
+                        }
+                        new_partner = Partner.create(partner_vals)
+                        
+                        # Puis créer l'utilisateur avec le partenaire
+                        user_vals = self._prepare_user_vals(
+                            name, login_candidate, new_partner.id, [self.env.ref('base.group_user').id])
+                        new_user = User.create(user_vals)
+                        new_user.flush_recordset()
+                except IntegrityError as e:
+                    # Login pris entre-temps (import concurrent) : suffixe suivant
+                    if e.pgcode != errorcodes.UNIQUE_VIOLATION:
+                        raise
+                    _logger.info("Login %s déjà utilisé, nouvel essai", login_candidate)
+                    continue
+                self.created_users_count += 1 
+                _logger.info(f"Utilisateur créé: {name} (login: {login_candidate})")
+                return new_user.id
+            raise UserError(_("Aucun login disponible pour '%s' après %d essais" % (name, LOGIN_ALLOCATION_ATTEMPTS)))
             
-        name = str(name or '').strip()
-        if not name or name.lower() in ('nan', 'none', 'n/a', 'na', ''):
+        except Exception as e:
+            _logger.error("Erreur recherche/création res.users '%s': %s", name, str(e))
+            self._log_results([{
+                'action': 'error',
+                'error_code': 'related_create_failed',
+                'message': _("Erreur: Impossible de créer l'utilisateur '%s': %s" % (name, str(e))),
+            }])
             return False
 
-        Model = self.env[model_name].sudo()
-        domain = [('name', '=ilike', name)]
-        
-        if domain_filter:
-            domain.extend(domain_filter)
-            
-        if model_name == 'res.country':
-            domain = ['|', ('name', '=ilike', name), ('code', '=ilike', name)]
-            
-        record = Model.search(domain, limit=1)
-        if record:
-            return record.id
+    def _resolve_partners(self, names):
+        """ Résout les clients (sociétés) par nom puis par nom commercial et crée les manquants """
+        partners = self._search_by_names(
+            'res.partner', names, ('name', 'commercial_company_name'),
+            domain_filter=[('is_company', '=', True)],
+        )
+        lookup = {}
+        # Priorité au nom exact, puis au nom commercial
+        for field_name in ('name', 'commercial_company_name'):
+            for partner in partners:
+                key = _normalize_name(partner[field_name])
+                if key in names:
+                    lookup.setdefault(key, partner['id'])
 
-        try:
-            new_record = Model.create({'name': name})
+        missing = [key for key in names if key not in lookup]
+        if self.dry_run:
+            lookup.update({key: PendingRecord('res.partner', names[key]) for key in missing})
+            self.created_partners_count += len(missing)
+            return lookup
+
+        new_partners = self._create_in_bulk('res.partner', [{
+            'name': names[key],
+            'is_company': True,
+            'company_type': 'company',
+        } for key in missing], _('le partenaire'))
+        for partner in new_partners:
+            lookup[_normalize_name(partner.name)] = partner.id
+            _logger.info(f"Partenaire créé: {partner.name}")
+        self.created_partners_count += len(new_partners)
+        return lookup
+
+    def _resolve_misc(self, model_name, names):
+        """ Résout d'autres enregistrements par nom (et code pour les pays) et crée les manquants """
+        name_fields = ('name', 'code') if model_name == 'res.country' else ('name',)
+        records = self._search_by_names(model_name, names, name_fields)
+        lookup = {}
+        for field_name in name_fields:
+            for record in records:
+                key = _normalize_name(record[field_name])
+                if key in names:
+                    lookup.setdefault(key, record['id'])
+
+        missing = [key for key in names if key not in lookup]
+        if self.dry_run:
+            lookup.update({key: PendingRecord(model_name, names[key]) for key in missing})
             if model_name == 'res.partner.category':
-                self.created_categories_count += 1
-                _logger.info(f"Catégorie créée: {name}")
-            return new_record.id
-        except Exception as e:
-            _logger.error("Erreur recherche/création %s '%s': %s", model_name, name, str(e))
-            self.import_log += _("Erreur: Impossible de créer %s '%s': %s\n" % (model_name, name, str(e)))
-            return False
+                self.created_categories_count += len(missing)
+            return lookup
+
+        new_records = self._create_in_bulk(
+            model_name, [{'name': names[key]} for key in missing], model_name,
+        )
+        for record in new_records:
+            lookup[_normalize_name(record.name)] = record.id
+        if model_name == 'res.partner.category':
+            self.created_categories_count += len(new_records)
+            for record in new_records:
+                _logger.info(f"Catégorie créée: {record.name}")
+        return lookup
 
     # --- LOGIQUE DE MAPPING ET IMPORTATION ---
+
+    def _build_column_plan(self, headers):
+        """ Construit une fois par fichier la liste (index de colonne, champ, convertisseur).
+
+        Chaque convertisseur renvoie la valeur de la cellule, ou None pour ne pas
+        renseigner le champ ; le parcours des lignes n'effectue plus aucune recherche d'en-tête.
+        Les convertisseurs sont des fonctions de module (sérialisables pour le pool de processus) ;
+        les Many2one sont convertis en clés normalisées, résolues par _resolve_row_values.
+        """
+        selection_lookups = self._get_selection_lookups()
+        column_plan = []
+        for odoo_field, col_index in _match_columns(headers).items():
+            if odoo_field in RELATED_FIELD_MODELS:
+                converter = functools.partial(_convert_related_key, RELATED_FIELD_MODELS[odoo_field])
+            elif odoo_field in SELECTION_FIELDS:
+                converter = functools.partial(
+                    _convert_selection, selection_lookups[odoo_field], SELECTION_FALLBACKS.get(odoo_field),
+                )
+            elif odoo_field == 'date_in':
+                converter = self._build_date_parser(col_index)
+            elif odoo_field in AMOUNT_FIELDS:
+                converter = _convert_amount
+            else:
+                converter = _convert_text
+            column_plan.append((col_index, odoo_field, converter))
+
+        ignored = [header for header in headers if header and _normalize_header(header) not in NORMALIZED_COLUMN_MAPPING]
+        if ignored:
+            _logger.info(f"Colonnes ignorées: {ignored}")
+        return column_plan
+
+    def _sample_column_values(self, col_index, limit):
+        """ Jusqu'à limit valeurs texte non vides de la colonne, lues depuis le début du fichier """
+        samples = []
+        rows = self._iter_import_rows()
+        try:
+            next(rows, None)
+            for row in rows:
+                value = row[col_index] if col_index < len(row) else None
+                if isinstance(value, str) and value.strip():
+                    samples.append(value.strip())
+                    if len(samples) >= limit:
+                        break
+        finally:
+            rows.close()
+        return samples
+
+    def _build_date_parser(self, col_index):
+        """ Déduit une fois le format de la colonne Date IN et renvoie son convertisseur.
+
+        Le format est conservé sur l'assistant : les reprises ne relisent pas l'échantillon.
+        """
+        if self.date_in_format:
+            return DateParser(self.date_in_format)
+        samples = self._sample_column_values(col_index, DATE_SAMPLE_SIZE)
+        date_format = _infer_date_format(samples)
+        self.date_in_format = date_format
+        if samples:
+            _logger.info("Format de date détecté: %s (%d valeurs échantillonnées)", date_format, len(samples))
+            self._log_results([{'action': 'info', 'message': _("Format de date détecté pour 'Date IN': %s" % date_format)}])
+        return DateParser(date_format)
+
+    def _resolve_row_values(self, values, lookups):
+        """ Remplace les clés Many2one par les ids pré-résolus (champ retiré si non résolu) """
+        for odoo_field, model_name in RELATED_FIELD_MODELS.items():
+            key = values.get(odoo_field)
+            if key is None:
+                continue
+            record_id = lookups[model_name].get(key)
+            if record_id:
+                values[odoo_field] = record_id
+            else:
+                del values[odoo_field]
+        return values
+
+    def _iter_converted_rows(self, rows, column_plan, resume_after):
+        """ Lignes converties (n° de ligne, valeurs, anomalies, erreur), dans l'ordre du fichier.
+
+        Avec parallel_workers > 1, la conversion est répartie par blocs dans un pool de
+        processus (fork) ; le nombre de blocs en cours est borné pour garder une mémoire constante.
+        """
+        indexed_rows = (
+            (row_index, row) for row_index, row in enumerate(rows, start=2)
+            if row_index > resume_after
+        )
+        workers = self.parallel_workers
+        if workers <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+            for indexed_row in indexed_rows:
+                yield _convert_indexed_row(column_plan, indexed_row)
+            return
+
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'))
+        convert_chunk = functools.partial(_convert_rows, column_plan)
+        pending = deque()
+        try:
+            for chunk in split_every(PARALLEL_CHUNK_ROWS, indexed_rows, list):
+                pending.append(executor.submit(convert_chunk, chunk))
+                if len(pending) >= 2 * workers:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
     
-    def _format_value(self, field, value):
-        """ Formate les valeurs selon le type de champ """
-        if value is None or str(value).strip().lower() in ('nan', 'none', 'n/a', 'na', ''):
-            return None
-            
-        value_str = str(value).strip()
-
-        selection_mapping = {
-            'nature': {
-                'livraison': 'livraison', 
-                'end to end': 'end_to_end',
-                'services pro': 'service_pro',
-                'service pro': 'service_pro',
-                'all': 'all',
-            },
-            'bu': {
-                'ict': 'ict', 
-                'cloud': 'cloud', 
-                'cybersecurity': 'cybersecurity',
-                'formation': 'formation', 
-                'security': 'security',
-            },
-            'revenue_type': { 
-                'recurrent': 'recurrent', 
-                'one shot': 'oneshot', 
-                'oneshot': 'oneshot',
-                'one-shot': 'oneshot',
-            },
-            'circuit': { 
-                'fast track': 'fast',
-                'fast': 'fast',
-                'normal': 'normal', 
-            },
-            'domaine': {
-                'datacenter facilities (dcf)': 'datacenter_facilities',
-                'modern network integration (mni)': 'modern_network_integration',
-                'agile infrastructure & cloud (aic)': 'agile_infrastructure_cloud',
-                'business data integration (bdi)': 'business_data_integration',
-                'digital workspace (dws)': 'digital_workspace',
-                'secured it (sec)': 'secured_it',
-                'expert & managed services - think': 'expert_managed_services_think',
-                'expert & managed services - build': 'expert_managed_services_build',
-                'expert & managed services - train': 'expert_managed_services_train',
-                'expert & managed services - run': 'expert_managed_services_run',
-                'none': 'none',
-                'others': 'others',
-            },
-            'etat_projet': { 
-                '0-annulé': 'cancelled', 
-                '1-non démarré': 'non_demarre', 
-                '2-en cours': 'en_cours_production', 
-                '3-en cours - provisionning': 'en_cours_provisionning', 
-                '4-en cours - livraison': 'en_cours_production',
-                '5-terminé - pv/bl signé': 'termine_pv_bl_signe',
-                '6-facturé - attente df': 'facture_attente_df', 
-                '7-cloturé': 'cloture', 
-                '8-suivi - contrat licence': 'suivi_contrat_licence', 
-                '8-suivi - contrat mixte': 'suivi_contrat_mixte', 
-                '8-suivi - contrat de services': 'suivi_contrat_services',
-                '9-suspendu': 'suspendu', 
-                'cloturé': 'cloture', 
-                'non démarré': 'non_demarre',
-                'en cours': 'en_cours_production', 
-                'terminé': 'termine_pv_bl_signe',
-                'facturé': 'facture_attente_df', 
-                'draft': 'draft', 
-                'suspendu': 'suspendu',
-                'cancelled': 'cancelled',
-            }
-        }
-        
-        if field in selection_mapping:
-            for excel_val, odoo_val in selection_mapping[field].items():
-                if value_str.lower() == excel_val.lower():
-                    return odoo_val
-        
-        # Valeurs par défaut si non trouvé
-        fallback_values = {
-            'nature': 'all', 
-            'bu': 'ict', 
-            'domaine': 'others',
-            'etat_projet': 'non_demarre', 
-            'revenue_type': 'oneshot', 
-            'circuit': 'normal'
+    def _get_selection_lookups(self):
+        """ Tables {libellé normalisé: valeur} par champ de sélection pour cet import.
+
+        Combine les clés et libellés des champs fields.Selection de project.project
+        avec les alias de SELECTION_ALIASES (prioritaires).
+        """
+        Project = self.env['project.project']
+        lookups = {}
+        for field_name in SELECTION_FIELDS:
+            lookup = {}
+            field = Project._fields.get(field_name)
+            if field is not None and field.type == 'selection':
+                for value, label in field._description_selection(self.env):
+                    lookup[_normalize_name(value)] = value
+                    lookup[_normalize_name(label)] = value
+            lookup.update(_SELECTION_LOOKUPS.get(field_name, {}))
+            lookups[field_name] = lookup
+        return lookups
+
+    # --- ÉCRITURE GROUPÉE DES PROJETS ---
+
+    def _load_project_index(self, project_names):
+        """ Index {nom: id} des projets existants portant un des noms (premier selon l'ordre par défaut) """
+        index = {}
+        for chunk in split_every(PREFETCH_CHUNK_SIZE, list(project_names)):
+            for project in self.env['project.project'].sudo().search_read([('name', 'in', chunk)], ['name']):
+                index.setdefault(project['name'], project['id'])
+        return index
+
+    def _queue_project_upsert(self, batch, row_index, project_name, values):
+        """ Place la ligne dans le lot de créations ou de mises à jour.
+
+        Les doublons de nom dans le fichier sont fusionnés dans l'ordre des lignes,
+        comme une création suivie de mises à jour successives.
+        """
+        project_id = batch['index'].get(project_name)
+        pending_create = batch['creates'].get(project_name)
+
+        if (project_id or pending_create) and self.update_existing:
+            if pending_create:
+                entry = pending_create
+            else:
+                entry = batch['writes'].setdefault(project_id, {'name': project_name, 'rows': [], 'values': {}})
+            entry['rows'].append(row_index)
+            entry['values'].update(values)
+
+        elif not (project_id or pending_create) and self.create_missing:
+            batch['creates'][project_name] = {'name': project_name, 'rows': [row_index], 'values': dict(values)}
+
+        else:
+            self._add_row_result(
+                batch, row_index, project_name, 'skipped',
+                _("Ligne %d: Projet '%s' ignoré (existe déjà et mise à jour désactivée)." % (row_index, project_name)),
+            )
+
+    def _log_batch_error(self, batch, entry, error, error_code):
+        """ Journalise l'échec d'une écriture pour chacune des lignes concernées """
+        for row_index in entry['rows']:
+            error_message = _("Erreur ligne %d pour projet '%s': %s" % (row_index, entry['name'], str(error)))
+            _logger.error(error_message)
+            self._add_row_result(batch, row_index, entry['name'], 'error', error_message, error_code)
+
+    def _read_current_values(self, project_ids, field_names):
+        """ Lit en masse les valeurs actuelles des projets : {id: {champ: valeur lue}} """
+        Project = self.env['project.project'].sudo()
+        current = {}
+        for chunk in split_every(PREFETCH_CHUNK_SIZE, list(project_ids)):
+            for record in Project.browse(chunk).read(list(field_names)):
+                current[record['id']] = record
+        return current
+
+    def _get_html_fields(self, field_names):
+        """ Champs Html du projet parmi field_names (comparés sur leur texte) """
+        project_fields = self.env['project.project']._fields
+        return {field_name for field_name in field_names if project_fields[field_name].type == 'html'}
+
+    def _describe_changes(self, changes):
+        """ Lignes « champ: ancienne → nouvelle » lisibles pour le rapport de simulation """
+        Project = self.env['project.project']
+        # Noms des enregistrements liés en une lecture par modèle
+        related_ids = defaultdict(set)
+        for field_name, (old_value, new_value) in changes.items():
+            field = Project._fields[field_name]
+            if field.type == 'many2one' and isinstance(new_value, int):
+                related_ids[field.comodel_name].add(new_value)
+        names = {
+            (model_name, record.id): record.display_name
+            for model_name, ids in related_ids.items()
+            for record in self.env[model_name].sudo().browse(list(ids))
         }
-        
-        return fallback_values.get(field, value_str)
+
+        def display(field_name, value):
+            # PendingRecord est un namedtuple : testé avant les tuples (id, nom) lus
+            if isinstance(value, PendingRecord):
+                return _("%s (à créer)" % value.name)
+            if isinstance(value, tuple):
+                return value[1]
+            field = Project._fields[field_name]
+            if field.type == 'many2one' and isinstance(value, int):
+                return names.get((field.comodel_name, value), value)
+            return value if value not in (False, None) else ''
+
+        return [
+            "%s: %s → %s" % (field_name, display(field_name, old_value), display(field_name, new_value))
+            for field_name, (old_value, new_value) in changes.items()
+        ]
+
+    def _report_project_batch(self, batch):
+        """ Mode simulation : calcule créations et différences du lot sans rien écrire """
+        writes = batch['writes']
+        field_names = {field_name for entry in writes.values() for field_name in entry['values']}
+        existing_ids = [project_id for project_id in writes if isinstance(project_id, int)]
+        current = self._read_current_values(existing_ids, field_names) if existing_ids and field_names else {}
+        html_fields = self._get_html_fields(field_names)
+
+        for entry in batch['creates'].values():
+            batch['index'][entry['name']] = PendingRecord('project.project', entry['name'])
+            first_row, *other_rows = entry['rows']
+            details = self._describe_changes({key: (False, value) for key, value in entry['values'].items()})
+            self._add_row_result(
+                batch, first_row, entry['name'], 'to_create',
+                _("Ligne %d: Projet '%s' à créer." % (first_row, entry['name'])), details=details,
+            )
+            for row_index in other_rows:
+                self._add_row_result(
+                    batch, row_index, entry['name'], 'to_update',
+                    _("Ligne %d: Projet '%s' à mettre à jour (doublon dans le fichier)." % (row_index, entry['name'])),
+                )
+
+        for project_id, entry in writes.items():
+            changes = _diff_values(current.get(project_id, {}), entry['values'], html_fields)
+            last_row = entry['rows'][-1]
+            for row_index in entry['rows'][:-1]:
+                self._add_row_result(
+                    batch, row_index, entry['name'], 'to_update',
+                    _("Ligne %d: Projet '%s' à mettre à jour (fusionné avec la ligne %d)." % (row_index, entry['name'], last_row)),
+                )
+            if changes:
+                self._add_row_result(
+                    batch, last_row, entry['name'], 'to_update',
+                    _("Ligne %d: Projet '%s' à mettre à jour (%d champ(s) modifié(s))." % (last_row, entry['name'], len(changes))),
+                    details=self._describe_changes(changes),
+                )
+            else:
+                self._add_row_result(
+                    batch, last_row, entry['name'], 'unchanged',
+                    _("Ligne %d: Projet '%s' inchangé." % (last_row, entry['name'])),
+                )
+
+        batch['creates'].clear()
+        batch['writes'].clear()
+
+    def _flush_project_batch(self, batch):
+        """ Exécute le lot : un create(vals_list) pour les créations, un write par groupe de valeurs identiques """
+        if self.dry_run:
+            return self._report_project_batch(batch)
+
+        Project = self.env['project.project'].sudo()
+
+        entries = list(batch['creates'].values())
+        if entries:
+            failed = set()
+
+            def on_error(index, error):
+                failed.add(index)
+                self._log_batch_error(batch, entries[index], error, 'create_failed')
+
+            projects = self._create_in_bulk(
+                'project.project', [entry['values'] for entry in entries], _('le projet'), on_error,
+            )
+            created = zip([entry for index, entry in enumerate(entries) if index not in failed], projects)
+            for entry, project in created:
+                batch['index'][entry['name']] = project.id
+                first_row, *other_rows = entry['rows']
+                self._add_row_result(
+                    batch, first_row, entry['name'], 'created',
+                    _("Ligne %d: Projet '%s' créé." % (first_row, entry['name'])),
+                )
+                for row_index in other_rows:
+                    self._add_row_result(
+                        batch, row_index, entry['name'], 'updated',
+                        _("Ligne %d: Projet '%s' mis à jour." % (row_index, entry['name'])),
+                    )
+                _logger.info(f"Projet créé: {entry['name']} (ID: {project.id})")
+
+        # Seuls les champs dont la valeur change sont écrits (évite recalculs et suivi mail)
+        writes = batch['writes']
+        field_names = {field_name for entry in writes.values() for field_name in entry['values']}
+        current = self._read_current_values(list(writes), field_names) if writes and field_names else {}
+        html_fields = self._get_html_fields(field_names)
+
+        # Regroupe les projets recevant exactement les mêmes valeurs modifiées
+        write_groups = defaultdict(list)
+        for project_id, entry in writes.items():
+            changes = _diff_values(current.get(project_id, {}), entry['values'], html_fields)
+            if not changes:
+                for row_index in entry['rows']:
+                    self._add_row_result(
+                        batch, row_index, entry['name'], 'unchanged',
+                        _("Ligne %d: Projet '%s' inchangé, aucune écriture." % (row_index, entry['name'])),
+                    )
+                continue
+            entry['values'] = {field_name: new_value for field_name, (_old, new_value) in changes.items()}
+            write_groups[tuple(sorted(entry['values'].items()))].append(project_id)
+
+        for project_ids in write_groups.values():
+            values = writes[project_ids[0]]['values']
+            try:
+                with self.env.cr.savepoint():
+                    Project.browse(project_ids).write(values)
+                written = project_ids
+            except Exception as e:
+                _logger.warning("Mise à jour groupée des projets impossible (%s), repli ligne à ligne", str(e))
+                written = []
+                for project_id in project_ids:
+                    try:
+                        with self.env.cr.savepoint():
+                            Project.browse(project_id).write(values)
+                        written.append(project_id)
+                    except Exception as row_error:
+                        self._log_batch_error(batch, batch['writes'][project_id], row_error, 'write_failed')
+
+            for project_id in written:
+                entry = batch['writes'][project_id]
+                for row_index in entry['rows']:
+                    self._add_row_result(
+                        batch, row_index, entry['name'], 'updated',
+                        _("Ligne %d: Projet '%s' mis à jour." % (row_index, entry['name'])),
+                    )
+                _logger.info(f"Projet mis à jour: {entry['name']}")
+
+        batch['creates'].clear()
+        batch['writes'].clear()
 
     def _show_result_wizard(self):
         """Affiche le wizard avec les résultats"""
@@ -333,155 +1272,252 @@ class ProjectImportWizard(models.TransientModel):
             'context': self.env.context,
         }
 
-    def action_import_projects(self):
-        """Logique principale d'importation des projets."""
-        self.import_log = ""
-        self.success_count = 0
-        self.error_count = 0
+    def _spool_import_file(self):
+        """ Décode le fichier importé par blocs dans un fichier temporaire (déversé sur disque si volumineux) """
+        raw = self.import_file or b''
+        if isinstance(raw, str):
+            raw = raw.encode()
+        spool = tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_MAX_SIZE)
+        for start in range(0, len(raw), IMPORT_DECODE_CHUNK_SIZE):
+            spool.write(base64.b64decode(raw[start:start + IMPORT_DECODE_CHUNK_SIZE]))
+        spool.seek(0)
+        return spool
+
+    def _get_row_source(self, fileobj):
+        """ Source de lignes du fichier : classeur .xlsx (feuille active, nommée ou toutes) ou CSV """
+        return open_row_source(
+            fileobj,
+            filename=self.import_filename,
+            sheet_name=(self.sheet_name or '').strip() or None,
+            all_sheets=self.all_sheets,
+        )
+
+    def _count_import_rows(self):
+        """ Nombre de lignes de données (hors en-têtes), compté en un parcours du fichier """
+        spool = self._spool_import_file()
+        try:
+            return self._get_row_source(spool).count_rows()
+        finally:
+            spool.close()
+
+    def _iter_import_rows(self):
+        """ Parcourt le fichier en streaming via sa source de lignes (xlsx read-only ou CSV).
+
+        La première valeur produite est la ligne d'en-têtes ; la mémoire reste
+        constante quel que soit le nombre de lignes.
+        """
+        spool = self._spool_import_file()
+        try:
+            yield from self._get_row_source(spool).iter_rows()
+        finally:
+            spool.close()
+
+    def _commit_checkpoint(self, batch, row_index):
+        """ Écrit le lot en cours et enregistre le point de reprise (validé en base en mode par lots) """
+        self._flush_project_batch(batch)
+        self._flush_results(batch)
+        self.last_committed_row = row_index
+        self.processed_rows = max(row_index - 1, 0)
+        if self.commit_chunks or self.background_job:
+            self.env.cr.commit()
+            _logger.info(f"Import: lignes validées jusqu'à la ligne {row_index}")
+
+    def _reset_import_progress(self):
+        """Réinitialise les compteurs et le point de reprise avant un nouvel import."""
+        self.result_line_ids.unlink()
         self.created_users_count = 0
         self.created_partners_count = 0
         self.created_categories_count = 0
-        
-        Project = self.env['project.project'].sudo()
+        self.last_committed_row = 1
+        self.date_in_format = False
+        self.processed_rows = 0
+        self.total_rows = 0
+        self.import_started_at = fields.Datetime.now()
+
+    def action_import_projects(self):
+        """Logique principale d'importation des projets."""
+        self._reset_import_progress()
+        self.dry_run = False
+        self.background_job = False
+        self.import_state = 'in_progress'
+
+        self._run_import()
+        return self._show_result_wizard()
+
+    def action_dry_run(self):
+        """Simule l'import : résout chaque ligne et rapporte créations et différences sans rien écrire."""
+        self.ensure_one()
+        self._reset_import_progress()
+        self.dry_run = True
+        self.background_job = False
+        self.import_state = 'in_progress'
+
+        self._run_import()
+        return self._show_result_wizard()
 
-        if not openpyxl:
-            raise UserError(_("Le module openpyxl n'est pas installé. Veuillez l'installer."))
+    def action_queue_import(self):
+        """Place l'import en file d'attente : il sera traité par lots par le cron, hors de la requête HTTP."""
+        self.ensure_one()
+        self._reset_import_progress()
+        self.dry_run = False
+        self.background_job = True
+        self.import_state = 'queued'
+        self._log_results([{'action': 'info', 'message': _("Import placé en file d'attente.")}])
+        self.env.ref('odoo_sync_from_odoo11.ir_cron_project_import_queue')._trigger()
+        return self._show_result_wizard()
+
+    def action_refresh_progress(self):
+        """Recharge le formulaire pour afficher la progression courante."""
+        return self._show_result_wizard()
+
+    @api.model
+    def _cron_process_import_queue(self, rows_per_run=BACKGROUND_ROWS_PER_RUN):
+        """Traite un lot de lignes pour chaque import en arrière-plan et se replanifie s'il en reste."""
+        jobs = self.search([
+            ('background_job', '=', True),
+            ('import_state', 'in', ('queued', 'in_progress')),
+        ], order='id')
+        pending = False
+        for job in jobs:
+            job = job.with_user(job.create_uid)
+            try:
+                if job.import_state == 'queued':
+                    job.import_state = 'in_progress'
+                    job.import_started_at = fields.Datetime.now()
+                    job.total_rows = job._count_import_rows()
+                    self.env.cr.commit()
+                finished = job._run_import(row_limit=rows_per_run)
+                pending = pending or not finished
+            except Exception as e:
+                self.env.cr.rollback()
+                _logger.exception("Échec de l'import en arrière-plan %s", job.id)
+                job.import_state = 'failed'
+                job._log_results([{
+                    'action': 'error',
+                    'error_code': 'import_failed',
+                    'message': _("Erreur: import interrompu après la ligne %d: %s" % (job.last_committed_row, str(e))),
+                }])
+            self.env.cr.commit()
+        if pending:
+            self.env.ref('odoo_sync_from_odoo11.ir_cron_project_import_queue')._trigger()
+
+    def action_resume_import(self):
+        """Reprend l'import interrompu à partir du dernier point de reprise."""
+        self.ensure_one()
+        if self.import_state not in ('in_progress', 'failed'):
+            raise UserError(_("Aucun import interrompu à reprendre."))
+        self._log_results([{'action': 'info', 'message': _("--- Reprise après la ligne %d ---" % self.last_committed_row)}])
+        if self.background_job:
+            self.import_state = 'queued'
+            self.env.ref('odoo_sync_from_odoo11.ir_cron_project_import_queue')._trigger()
+            return self._show_result_wizard()
+        self.import_state = 'in_progress'
+        self._run_import()
+        return self._show_result_wizard()
+
+    def _run_import(self, row_limit=None):
+        """Parcourt le fichier à partir du point de reprise et importe les projets par lots.
+
+        Avec row_limit, s'arrête au premier point de reprise après ce nombre de lignes
+        et renvoie False ; renvoie True lorsque le fichier a été entièrement traité.
+        """
+        chunk_size = max(self.chunk_size, 1)
+        resume_after = self.last_committed_row
 
         try:
-            data = base64.b64decode(self.import_file)
-            f = io.BytesIO(data)
-            workbook = openpyxl.load_workbook(f)
-            sheet = workbook.active
+            rows = self._iter_import_rows()
+            header_row = next(rows, ())
             
         except Exception as e:
-            raise UserError(_("Erreur lors de la lecture du fichier : %s. Assurez-vous qu'il s'agit d'un fichier .xlsx valide." % str(e)))
+            raise UserError(_("Erreur lors de la lecture du fichier : %s. Assurez-vous qu'il s'agit d'un fichier .xlsx ou .csv valide." % str(e)))
 
-        headers = [str(cell.value).strip() if cell.value is not None else '' for cell in sheet[1]]
+        headers = [str(value).strip() if value is not None else '' for value in header_row]
         _logger.info(f"En-têtes détectés: {headers}")
+
+        # Dernière ligne de l'exécution : premier point de reprise atteint après row_limit lignes
+        stop_after = None
+        if row_limit:
+            stop_after = -(-(resume_after + row_limit) // chunk_size) * chunk_size
+
+        # Noms liés et projets collectés sur la seule tranche de lignes de cette exécution
+        names = self._collect_related_names(headers, resume_after, stop_after)
+        lookups = self._prefetch_related_records(names)
+        column_plan = self._build_column_plan(headers)
+        batch = {
+            'index': self._load_project_index(names['project.project']),
+            'creates': {}, 'writes': {}, 'results': [], 'row_issues': {},
+        }
+        # Les enregistrements liés créés sont conservés même si un lot échoue ensuite
+        self._commit_checkpoint(batch, resume_after)
         
-        for row_index, row in enumerate(sheet.iter_rows(min_row=2), start=2):
-            project_name = None
-            try:
-                values = {}
-                
-                for excel_header, odoo_field in COLUMN_MAPPING.items():
-                    if excel_header not in headers:
-                        continue 
-                        
-                    col_index = headers.index(excel_header) 
-                    cell_value = row[col_index].value
-                    
-                    if cell_value is None or str(cell_value).strip() == '':
-                        continue
-                    
-                    _logger.debug(f"Traitement: {excel_header} -> {odoo_field} = {cell_value}")
-                    
-                    # Champs Many2one sur res.users (PM, AM, Presales, SC)
-                    if odoo_field in ['user_id', 'am', 'presales', 'sc']:
-                        user_id = self._find_or_create_user(cell_value)
-                        if user_id:
-                            values[odoo_field] = user_id
-
-                    # Many2one sur res.country (Pays)
-                    elif odoo_field == 'pays':
-                        country_id = self._find_or_create_misc('res.country', cell_value)
-                        if country_id:
-                            values[odoo_field] = country_id
-
-                    # Champ date (Date IN)
-                    elif odoo_field == 'date_in':
-                        if isinstance(cell_value, datetime):
-                            values[odoo_field] = cell_value.strftime('%Y-%m-%d')
-                        elif isinstance(cell_value, str):
-                            try:
-                                # Essayer différents formats de date
-                                for fmt in ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%m/%d/%Y']:
-                                    try:
-                                        values[odoo_field] = datetime.strptime(cell_value, fmt).strftime('%Y-%m-%d')
-                                        break
-                                    except ValueError:
-                                        continue
-                            except ValueError:
-                                _logger.warning(f"Format de date invalide pour {cell_value}")
-
-                    # Many2one sur res.partner (Customer)
-                    elif odoo_field == 'partner_id':
-                        partner_id = self._find_or_create_partner(cell_value)
-                        if partner_id:
-                            values[odoo_field] = partner_id
-                            
-                    # Many2one sur res.partner.category (Secteur)
-                    elif odoo_field == 'secteur':
-                        category_id = self._find_or_create_misc('res.partner.category', cell_value)
-                        if category_id:
-                            values[odoo_field] = category_id
-                            
-                    # Champs de sélection
-                    elif odoo_field in ['nature', 'bu', 'domaine', 'revenue_type', 'circuit', 'etat_projet']:
-                        formatted_value = self._format_value(odoo_field, cell_value)
-                        if formatted_value:
-                            values[odoo_field] = formatted_value
-                            
-                    # Champs monétaires (CAS)
-                    elif odoo_field in ['cas_build', 'cas_run', 'cas_train', 'cas_sw', 'cas_hw', 'cas']:
-                        try:
-                            if isinstance(cell_value, (int, float)):
-                                values[odoo_field] = float(cell_value)
-                            elif isinstance(cell_value, str):
-                                cleaned_value = re.sub(r'[^\d\.\,]', '', str(cell_value))
-                                values[odoo_field] = float(cleaned_value.replace(',', '.') or 0)
-                            else:
-                                values[odoo_field] = 0.0
-                        except (ValueError, TypeError) as e:
-                            _logger.warning(f"Valeur monétaire invalide pour {cell_value}: {e}")
-                            values[odoo_field] = 0.0
-                            
-                    # Champ texte (Nom)
-                    elif odoo_field == 'name':
-                        project_name = str(cell_value).strip()
-                        values[odoo_field] = project_name
-                        
-                    # Champs de texte simples
-                    elif odoo_field in ['description', 'cat_recurrent']:
-                        values[odoo_field] = str(cell_value).strip()
+        row_index = resume_after
+        converted_rows = self._iter_converted_rows(rows, column_plan, resume_after)
+        try:
+            for row_index, values, row_issues, conversion_error in converted_rows:
+                if (row_index - 1) % chunk_size == 0:
+                    self._commit_checkpoint(batch, row_index - 1)
+                    if stop_after and row_index - 1 >= stop_after:
+                        return False
 
-                if not project_name:
-                    self.error_count += 1
-                    self.import_log += _("Ligne %d: Nom du projet manquant, ligne ignorée.\n" % row_index)
-                    continue
+                project_name = None
+                try:
+                    if conversion_error:
+                        raise ValueError(conversion_error)
 
-                # Recherche du projet existant
-                existing_project = Project.search([('name', '=', project_name)], limit=1)
+                    if row_issues:
+                        batch['row_issues'][row_index] = [
+                            _("%s: valeur '%s' non reconnue ou hors format attendu" % (odoo_field, cell_value))
+                            for odoo_field, cell_value in row_issues
+                        ]
+                        _logger.warning("Ligne %d: %s", row_index, ", ".join(batch['row_issues'][row_index]))
 
-                # Opérations sur le projet
-                if existing_project and self.update_existing:
-                    existing_project.write(values)
-                    self.import_log += _("Ligne %d: Projet '%s' mis à jour.\n" % (row_index, project_name))
-                    self.success_count += 1
-                    _logger.info(f"Projet mis à jour: {project_name}")
+                    values = self._resolve_row_values(values, lookups)
+                    project_name = values.get('name')
+                    if not project_name:
+                        self._add_row_result(
+                            batch, row_index, False, 'error',
+                            _("Ligne %d: Nom du projet manquant, ligne ignorée." % row_index), 'missing_name',
+                        )
+                        continue
+
+                    self._queue_project_upsert(batch, row_index, project_name, values)
+                    if len(batch['creates']) + len(batch['writes']) >= IMPORT_BATCH_SIZE:
+                        self._flush_project_batch(batch)
                     
-                elif not existing_project and self.create_missing:
-                    new_project = Project.create(values)
-                    self.import_log += _("Ligne %d: Projet '%s' créé.\n" % (row_index, project_name))
-                    self.success_count += 1
-                    _logger.info(f"Projet créé: {project_name} (ID: {new_project.id})")
-                else:
-                    self.import_log += _("Ligne %d: Projet '%s' ignoré (existe déjà et mise à jour désactivée).\n" % (row_index, project_name))
-                
-            except Exception as e:
-                self.error_count += 1
-                error_message = _("Erreur ligne %d pour projet '%s': %s" % (row_index, project_name or "N/A", str(e)))
-                _logger.error(error_message)
-                self.import_log += error_message + "\n"
-                
-        # Résumé final
-        self.import_log += "\n--- RÉSUMÉ ---\n"
-        self.import_log += _("Total Projets importés/mis à jour: %d\n" % self.success_count)
-        self.import_log += _("Total Erreurs: %d\n" % self.error_count)
-        self.import_log += _("Total Utilisateurs créés: %d\n" % self.created_users_count)
-        self.import_log += _("Total Clients créés: %d\n" % self.created_partners_count)
-        self.import_log += _("Total Catégories créées: %d\n" % self.created_categories_count)
+                except Exception as e:
+                    error_message = _("Erreur ligne %d pour projet '%s': %s" % (row_index, project_name or "N/A", str(e)))
+                    _logger.error(error_message)
+                    self._add_row_result(batch, row_index, project_name, 'error', error_message, 'row_failed')
+        finally:
+            converted_rows.close()
 
+        self._commit_checkpoint(batch, row_index)
+        self.import_state = 'done'
+                
         _logger.info(f"Import terminé: {self.success_count} succès, {self.error_count} erreurs")
 
-        return self._show_result_wizard()
\ No newline at end of file
+        return True
+
+
+class ProjectImportWizardLine(models.TransientModel):
+    _name = 'project.import.wizard.line'
+    _description = "Résultat d'import de projet par ligne"
+    _order = 'id'
+    _transient_max_hours = 48.0
+
+    wizard_id = fields.Many2one('project.import.wizard', string='Import', required=True, ondelete='cascade', index=True)
+    row_index = fields.Integer(string='Ligne')
+    project_name = fields.Char(string='Projet')
+    action = fields.Selection([
+        ('created', 'Créé'),
+        ('updated', 'Mis à jour'),
+        ('skipped', 'Ignoré'),
+        ('error', 'Erreur'),
+        ('info', 'Information'),
+        ('to_create', 'À créer'),
+        ('to_update', 'À mettre à jour'),
+        ('unchanged', 'Inchangé'),
+    ], string='Action', required=True)
+    error_code = fields.Char(string="Code d'erreur")
+    message = fields.Char(string='Message')
+    details = fields.Text(string='Détails', help="Différences ancienne → nouvelle valeur, valeurs non reconnues")
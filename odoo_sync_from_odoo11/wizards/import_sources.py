@@ -0,0 +1,187 @@
+import codecs
+import csv
+import io
+import logging
+
+_logger = logging.getLogger(__name__)
+
+try:
+    import openpyxl
+except ImportError:
+    _logger.warning("Le module openpyxl n'est pas installé. Installation requise: pip install openpyxl")
+    openpyxl = None
+
+# Signature des fichiers zip (.xlsx)
+XLSX_MAGIC = b'PK\x03\x04'
+
+# Taille de l'échantillon utilisé pour détecter l'encodage et le séparateur CSV
+CSV_SNIFF_SIZE = 64 * 1024
+CSV_DELIMITERS = ';,\t|'
+# Encodages essayés dans l'ordre (exports Excel français : cp1252)
+CSV_ENCODINGS = ('utf-8', 'cp1252', 'latin-1')
+
+
+def _normalize_header(header):
+    """ En-tête sans distinction de casse ni d'espaces superflus """
+    return ' '.join(str(header or '').split()).lower()
+
+
+class RowSource:
+    """ Source de lignes en streaming.
+
+    iter_rows() produit d'abord la ligne d'en-têtes puis chaque ligne de données
+    sous forme de tuple de valeurs ; la mémoire reste constante.
+    """
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+
+    def iter_rows(self):
+        raise NotImplementedError()
+
+    def count_rows(self):
+        """ Nombre de lignes de données (hors en-têtes) """
+        return max(sum(1 for _row in self.iter_rows()) - 1, 0)
+
+
+class XlsxRowSource(RowSource):
+    """ Classeur .xlsx en lecture seule : feuille active, feuille nommée ou toutes les feuilles.
+
+    Avec plusieurs feuilles, chaque feuille a sa propre ligne d'en-têtes ; ses colonnes
+    sont réordonnées selon les en-têtes de la première feuille.
+    """
+
+    def __init__(self, fileobj, sheet_name=None, all_sheets=False):
+        super().__init__(fileobj)
+        if not openpyxl:
+            raise ImportError("Le module openpyxl n'est pas installé. Veuillez l'installer.")
+        self.sheet_name = sheet_name
+        self.all_sheets = all_sheets
+
+    def _open_workbook(self):
+        self.fileobj.seek(0)
+        return openpyxl.load_workbook(self.fileobj, read_only=True, data_only=True)
+
+    def _get_sheets(self, workbook):
+        if self.all_sheets:
+            sheets = workbook.worksheets
+        elif self.sheet_name:
+            if self.sheet_name not in workbook.sheetnames:
+                raise ValueError("Feuille '%s' introuvable (feuilles disponibles : %s)" % (
+                    self.sheet_name, ', '.join(workbook.sheetnames)))
+            sheets = [workbook[self.sheet_name]]
+        else:
+            sheets = [workbook.active]
+        # Certains exports écrivent des dimensions fausses (ex: 'A1') que la lecture seule
+        # appliquerait telles quelles : la feuille est lue jusqu'à sa dernière ligne réelle
+        for sheet in sheets:
+            sheet.reset_dimensions()
+        return sheets
+
+    def iter_rows(self):
+        workbook = self._open_workbook()
+        try:
+            headers = None
+            for sheet in self._get_sheets(workbook):
+                rows = sheet.iter_rows(values_only=True)
+                sheet_headers = next(rows, None)
+                if sheet_headers is None:
+                    continue
+                if headers is None:
+                    headers = sheet_headers
+                    yield headers
+                    yield from rows
+                    continue
+
+                # Réordonne les colonnes si la feuille n'a pas la même disposition
+                sheet_positions = {}
+                for position, header in enumerate(sheet_headers):
+                    sheet_positions.setdefault(_normalize_header(header), position)
+                positions = [sheet_positions.get(_normalize_header(header)) for header in headers]
+                if positions == list(range(len(headers))):
+                    yield from rows
+                    continue
+                for row in rows:
+                    yield tuple(
+                        row[position] if position is not None and position < len(row) else None
+                        for position in positions
+                    )
+        finally:
+            workbook.close()
+
+    def count_rows(self):
+        workbook = self._open_workbook()
+        try:
+            total = 0
+            for sheet in self._get_sheets(workbook):
+                # Dimensions non fiables : comptage en parcourant les lignes
+                total += max(sum(1 for _row in sheet.iter_rows(values_only=True)) - 1, 0)
+            return total
+        finally:
+            workbook.close()
+
+
+class CsvRowSource(RowSource):
+    """ Fichier CSV : encodage validé sur tout le fichier, séparateur détecté sur un échantillon du début """
+
+    def __init__(self, fileobj):
+        super().__init__(fileobj)
+        self.fileobj.seek(0)
+        sample = self.fileobj.read(CSV_SNIFF_SIZE)
+        self.encoding = self._sniff_encoding(fileobj, sample)
+        self.delimiter = self._sniff_delimiter(sample.decode(self.encoding, errors='ignore'))
+        _logger.info("CSV détecté: encodage %s, séparateur %r", self.encoding, self.delimiter)
+
+    @staticmethod
+    def _sniff_encoding(fileobj, sample):
+        """ Premier encodage de CSV_ENCODINGS décodant tout le fichier sans erreur.
+
+        Un début de fichier en ASCII ne suffit pas à conclure : un caractère accentué plus loin
+        serait sinon remplacé par « \ufffd » et créerait des doublons d'utilisateurs ou de clients.
+        """
+        if sample.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
+        for encoding in CSV_ENCODINGS:
+            decoder = codecs.getincrementaldecoder(encoding)()
+            fileobj.seek(0)
+            try:
+                for block in iter(lambda: fileobj.read(CSV_SNIFF_SIZE), b''):
+                    decoder.decode(block)
+                decoder.decode(b'', final=True)
+                return encoding
+            except UnicodeDecodeError:
+                continue
+        return 'latin-1'
+
+    @staticmethod
+    def _sniff_delimiter(text):
+        try:
+            return csv.Sniffer().sniff(text, delimiters=CSV_DELIMITERS).delimiter
+        except csv.Error:
+            # Repli : séparateur le plus fréquent dans la ligne d'en-têtes
+            first_line = text.split('\n', 1)[0]
+            return max(CSV_DELIMITERS, key=first_line.count)
+
+    def iter_rows(self):
+        self.fileobj.seek(0)
+        # Décodage strict en flux ; newline='' laisse le module csv gérer les fins de ligne
+        # (U+2028 ou \x0c dans une cellule ne coupent pas la ligne)
+        text = io.TextIOWrapper(self.fileobj, encoding=self.encoding, newline='')
+        try:
+            for row in csv.reader(text, delimiter=self.delimiter):
+                yield tuple(row)
+        finally:
+            # Le fichier sous-jacent reste ouvert (propriété de l'appelant)
+            text.detach()
+
+
+def open_row_source(fileobj, filename=None, sheet_name=None, all_sheets=False):
+    """ Choisit la source selon le contenu (signature zip) puis l'extension du fichier """
+    fileobj.seek(0)
+    magic = fileobj.read(len(XLSX_MAGIC))
+    fileobj.seek(0)
+    if magic == XLSX_MAGIC:
+        return XlsxRowSource(fileobj, sheet_name=sheet_name, all_sheets=all_sheets)
+    if filename and filename.lower().endswith(('.xlsx', '.xlsm')):
+        raise ValueError("Le fichier '%s' n'est pas un classeur .xlsx valide" % filename)
+    return CsvRowSource(fileobj)